@@ -0,0 +1,261 @@
+import math
+import numpy as np
+import functions_GA
+import functions_bounds
+import functions_patterns
+
+
+# Column generation engine for the cutting stock problem
+# Used in the GA_CSP file as an alternative to the Genetic Algorithm, with the same input and output
+
+# Column generation constants:
+MAX_CG_ITERATIONS = 500  # The maximum number of patterns added to the master problem
+MAX_PIVOTS = 10000  # The maximum number of simplex pivots per master problem
+EPSILON = 1e-9  # The tolerance of the simplex method and the pricing problem
+VERBOSE = True  # Print the best solution of every subset
+
+
+def solve_master(patterns, demand):
+    """
+    This function solves the linear relaxation of the master problem, which minimizes the number of base panels
+    sum(x) such that the patterns cut at least the demand of every length. It solves the dual problem, maximize
+    demand * y such that patterns * y <= 1, with a tableau simplex method. The dual starts from the feasible slack
+    basis, and Bland's rule prevents cycling on the degenerate pivots that are common for cutting patterns. The pattern
+    frequencies x are read from the slack columns of the objective row.
+
+    Parameters:
+    patterns (np.ndarray): The patterns of the master problem, one row of piece counts per pattern.
+    demand (np.ndarray): The demand for each order length.
+
+    Returns:
+        tuple: The pattern frequencies, the dual price of each order length and the objective value.
+    """
+    nr_of_patterns, nr_of_lengths = patterns.shape
+
+    # Rows: one constraint per pattern and the objective row, columns: the dual prices, the slacks and the right side
+    tableau = np.zeros((nr_of_patterns + 1, nr_of_lengths + nr_of_patterns + 1))
+    tableau[:nr_of_patterns, :nr_of_lengths] = patterns
+    tableau[:nr_of_patterns, nr_of_lengths:-1] = np.eye(nr_of_patterns)
+    tableau[:nr_of_patterns, -1] = 1
+    tableau[-1, :nr_of_lengths] = -demand
+    basis = list(range(nr_of_lengths, nr_of_lengths + nr_of_patterns))
+
+    for _ in range(MAX_PIVOTS):
+        # Bland's rule: the entering column is the first column with a negative reduced cost
+        entering = np.flatnonzero(tableau[-1, :-1] < -EPSILON)
+        if len(entering) == 0:
+            break
+        column = entering[0]
+
+        # Ratio test, ties are broken by the lowest index of the leaving variable
+        positive = np.flatnonzero(tableau[:-1, column] > EPSILON)
+        ratios = tableau[positive, -1] / tableau[positive, column]
+        ties = positive[ratios <= ratios.min() + EPSILON]
+        row = min(ties, key=lambda r: basis[r])
+
+        tableau[row] /= tableau[row, column]
+        factors = tableau[:, column].copy()
+        factors[row] = 0
+        tableau -= np.outer(factors, tableau[row])
+        basis[row] = column
+
+    prices = np.zeros(nr_of_lengths)
+    for row, variable in enumerate(basis):
+        if variable < nr_of_lengths:
+            prices[variable] = tableau[row, -1]
+
+    return tableau[-1, nr_of_lengths:-1].copy(), prices, tableau[-1, -1]
+
+
+def generate_columns(lengths, demand, base_length):
+    """
+    This function performs the column generation of Gilmore and Gomory. It starts with one homogeneous pattern per
+    order length and solves the master problem. The pricing problem is a bounded knapsack over the dual prices, and
+    its pattern is added to the master problem as long as its value is larger than one base panel.
+
+    Parameters:
+    lengths (np.ndarray): The order lengths.
+    demand (np.ndarray): The demand for each order length.
+    base_length (int): The length of a base panel.
+
+    Returns:
+        tuple: The patterns of the master problem, the pattern frequencies and the objective value of the relaxation.
+    """
+    patterns = np.diag(np.minimum(base_length // lengths, demand))
+
+    for _ in range(MAX_CG_ITERATIONS):
+        frequencies, prices, objective = solve_master(patterns, demand)
+
+        pattern, value = functions_patterns.bounded_knapsack(lengths, prices, demand, base_length)
+        if value <= 1 + EPSILON:
+            break
+
+        patterns = np.vstack([patterns, pattern])
+    else:
+        frequencies, prices, objective = solve_master(patterns, demand)
+
+    return patterns, frequencies, objective
+
+
+def fill_residual(solution, residual, lengths, base_length):
+    """
+    This function cuts the residual demand with the patterns of the least waste. Every pattern is the bounded knapsack
+    pattern with the longest used length for the residual demand, and it is cut as many times as the residual allows.
+
+    Parameters:
+    solution (list): The patterns of the solution, which is extended in place.
+    residual (np.ndarray): The residual demand for each order length, which is updated in place.
+    lengths (np.ndarray): The order lengths.
+    base_length (int): The length of a base panel.
+
+    Returns:
+        None
+    """
+    while residual.sum() > 0:
+        pattern, _ = functions_patterns.bounded_knapsack(lengths, lengths, residual, base_length)
+        times = functions_GA.applyPattern(residual, pattern)
+        if times == 0:
+            raise ValueError("An order length is longer than the base length")
+
+        solution.append([times] + pattern.tolist())
+
+
+def trim_excess(solution, excess):
+    """
+    This function removes the pieces that are cut more often than demanded. The pieces are removed from all copies of a
+    pattern at once where possible, otherwise one copy of a pattern is split off and trimmed.
+
+    Parameters:
+    solution (list): The patterns of the solution, which are updated in place.
+    excess (np.ndarray): The number of pieces of each order length that are cut more often than demanded.
+
+    Returns:
+        None
+    """
+    for i in np.flatnonzero(excess):
+        remaining = int(excess[i])
+
+        for pattern in solution:
+            if pattern[0] == 0:
+                continue
+            removed = min(pattern[i + 1], remaining // pattern[0])
+            pattern[i + 1] -= removed
+            remaining -= removed * pattern[0]
+
+        while remaining > 0:
+            pattern = next(pattern for pattern in solution if pattern[i + 1] > 0 and pattern[0] > 0)
+            split = pattern.copy()
+            pattern[0] -= 1
+
+            removed = min(split[i + 1], remaining)
+            split[0] = 1
+            split[i + 1] -= removed
+            remaining -= removed
+            solution.append(split)
+
+
+def merge_patterns(solution):
+    """
+    This function merges the equal patterns of a solution and drops the patterns without pieces or frequency.
+
+    Parameters:
+    solution (list): The patterns of the solution.
+
+    Returns:
+        list: The merged patterns.
+    """
+    merged = {}
+    for pattern in solution:
+        if pattern[0] > 0 and any(pattern[1:]):
+            cut = tuple(pattern[1:])
+            merged[cut] = merged.get(cut, 0) + pattern[0]
+
+    return [[frequency] + list(cut) for cut, frequency in merged.items()]
+
+
+def round_solution(patterns, frequencies, demand, lengths, base_length, round_up):
+    """
+    This function creates an integer solution from the fractional pattern frequencies of the relaxation. The
+    frequencies are rounded down and the residual demand is cut with the least waste patterns, or rounded up and the
+    pieces cut more often than demanded are trimmed.
+
+    Parameters:
+    patterns (np.ndarray): The patterns of the master problem.
+    frequencies (np.ndarray): The fractional pattern frequencies.
+    demand (np.ndarray): The demand for each order length.
+    lengths (np.ndarray): The order lengths.
+    base_length (int): The length of a base panel.
+    round_up (bool): Whether to round the frequencies up instead of down.
+
+    Returns:
+        list: The patterns of the integer solution, which cut exactly the demand.
+    """
+    if round_up:
+        rounded = np.ceil(frequencies - EPSILON).astype(np.int64)
+    else:
+        rounded = np.floor(frequencies + EPSILON).astype(np.int64)
+
+    solution = [[int(times)] + pattern.tolist() for times, pattern in zip(rounded, patterns) if times > 0]
+    residual = demand - rounded @ patterns
+
+    fill_residual(solution, np.maximum(residual, 0), lengths, base_length)
+    trim_excess(solution, np.maximum(-residual, 0))
+
+    return merge_patterns(solution)
+
+
+@functions_GA.measure_time
+def CG(order_length_quantities):
+    """
+    This is the column generation engine, an alternative to the Genetic Algorithm with the same input and output. It
+    solves the linear relaxation of the cutting stock problem with column generation and rounds the relaxation to an
+    integer solution in two ways, of which the solution with the fewest base panels is kept. The relaxation, rounded
+    up, is a lower bound next to the bounds of `functions_bounds`. A subset with an order length that is longer than
+    the base length raises a ValueError.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+
+    Returns:
+        tuple: The waste, material, number of base panels, lower bound and gap of the best solution, None if no
+        solution is valid.
+    """
+    base_length = functions_GA.base_length
+    lengths = np.fromiter(order_length_quantities.keys(), dtype=np.int64, count=len(order_length_quantities))
+    demand = np.fromiter(order_length_quantities.values(), dtype=np.int64, count=len(order_length_quantities))
+
+    # An order length that does not fit a base panel cannot be cut, and has no column in the master problem
+    too_long = lengths[lengths > base_length]
+    if len(too_long):
+        raise ValueError(f"The order lengths {too_long.tolist()} are longer than the base length {base_length}")
+
+    patterns, frequencies, objective = generate_columns(lengths, demand, base_length)
+
+    solutions = [round_solution(patterns, frequencies, demand, lengths, base_length, round_up)
+                 for round_up in (False, True)]
+    best = min(solutions, key=functions_GA.sum_baseLength)
+
+    sanity = functions_GA.demandCheck(order_length_quantities, best)
+    if not sanity:
+        if VERBOSE:
+            print('No valid solution found')
+        return None
+
+    N_nr_of_bases = functions_GA.sum_baseLength(best)
+    N_waste = functions_GA.CalcWaste([best], order_length_quantities=order_length_quantities)
+    N_material = float(N_nr_of_bases * base_length)
+
+    bound = max(functions_bounds.lower_bound(order_length_quantities, base_length), math.ceil(objective - 1e-6))
+    gap = N_nr_of_bases - bound
+
+    if VERBOSE:
+        print("-- Best Solution = ", best)
+        print("-- Material used = ", N_material)
+        print("-- Total Waste = ", N_waste)
+        print("-- Number of Base Lengths = ", N_nr_of_bases)
+        print("-- Number of Patterns = ", len(best))
+        print("-- Sanity Check of Solution = ", sanity)
+        print("-- Lower Bound (Number of Base Lengths) = ", bound)
+        print("-- Optimality Gap (Number of Base Lengths) = ", gap)
+
+    return N_waste, N_material, N_nr_of_bases, bound, gap
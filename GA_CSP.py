@@ -7,138 +7,407 @@ import matplotlib.pyplot as plt
 import numpy as np
 import functions_GA
 import functions_dataprep
+import functions_cache
+import functions_bounds
+import functions_patterns
+import functions_parallel
+import functions_runner
+import functions_selection
+import functions_schedule
+import functions_metrics
+import functions_progress
+import CG_CSP
+import contextlib
+import multiprocessing
+import random
+import queue
+import sys
 import time
+import traceback
 
-# Import the test data
-from data import df_production_orders_small
+# The test data is loaded by `data.load_orders` when it is used
+import data
 
 # Genetic Algorithm constants:
 POPULATION_SIZE = 250 # The size of the population of individuals
+ADAPTIVE_SCHEDULE = True  # Size the population and generations of every subset by its difficulty, see functions_schedule
 P_CROSSOVER = 0.9  # probability for crossover
+P_MUTATION = 0.2  # probability for the local search mutation
+MUTATION_TIME_BUDGET = 0.2  # Seconds per generation spent on the local search mutation, None for no limit
 MAX_GENERATIONS = 15  # The maximum number of generations
 HALL_OF_FAME_SIZE = 3  # The size of the hall of fame
+SELECTION = "tournament"  # Parent selection: "tournament", "sus" (stochastic universal sampling) or "roulette"
+TOURNAMENT_SIZE = functions_selection.TOURNAMENT_SIZE  # Number of individuals that compete in every tournament
+ELITE_SIZE = 2  # Number of best individuals copied unchanged into the next generation
+STALL_GENERATIONS = 5  # Stop when the best fitness has not improved for this many generations, None disables
+REPRESENTATION = "list"  # Encoding of an individual: "list" (list of patterns) or "array" (integer pattern matrix)
+N_WORKERS = 0  # Number of worker processes for evaluation and crossover, 0 or 1 runs in a single process
+SUBSET_WORKERS = 0  # Number of worker processes that optimize the subsets of a day, 0 or 1 runs them one by one
+DAY_WORKERS = 0  # Number of worker processes that optimize the days of a range, 0 or 1 runs them one by one
+FITNESS_CACHE_SIZE = functions_cache.CACHE_SIZE  # Number of individuals in the fitness and validity caches, 0 disables
+REMOVE_DUPLICATES = False  # Replace duplicate offspring by new individuals before they are evaluated
+USE_PATTERN_INDEX = False  # Take patterns from the precomputed index of maximal feasible patterns of the subset
+USE_PATTERN_GENERATOR = True  # Repair offspring and create the first individual with memoized knapsack patterns
+BATCH_POPULATION = True  # Create the initial population at once with arrays, not used with the pattern index
+N_ISLANDS = 4  # Number of island populations of the island model, each evolved in its own process
+MIGRATION_INTERVAL = 5  # Number of generations between two migrations of the island model
+N_MIGRANTS = 5  # Number of best individuals each island sends to the next island in the ring
+ISLAND_POLL_SECONDS = 1  # Seconds between two checks whether an island stopped without sending its results
+DEADLINE_SLICE = 50  # Number of individuals created or evaluated between two checks of the deadline of a timed run
+METRICS = True  # Collect the time per stage and the counters of every subset, see functions_metrics
+METRICS_PATH = None  # File of the subset metrics of every day, e.g. "metrics_{date}.csv" or ".json", None disables
+VERBOSE = True  # Print the statistics of every generation and the results of every subset
+PROGRESS_PATH = None  # Append-only JSON lines file with the statistics of every generation, None disables
+ENGINE = "GA"  # Engine of every subset: "GA", "islands", "CG" or a function that returns the engine name of a subset
+
+# Create the "FitnessMin" and "Individual" classes in the creator module
+functions_GA.setup_creator()
+
+
+def create_toolbox(order_length_quantities, representation=REPRESENTATION, pool=None, workers=N_WORKERS,
+                   cache_size=FITNESS_CACHE_SIZE, pattern_index=None, pattern_generator=None,
+                   batch_population=BATCH_POPULATION, mutation_budget=MUTATION_TIME_BUDGET, selection=SELECTION,
+                   metrics=METRICS):
+    # Initialize the toolbox
+    toolbox = base.Toolbox()
+
+    # Register the "individualFunction" function in the toolbox
+    # This function creates an individual by calling the "create_individual" function from the "functions" module
+    # It takes in the "objects" and "base_length" data as arguments
+    # With the array representation the patterns are stored as an integer matrix
+    if representation == "array":
+        toolbox.register('individualFunction', functions_GA.create_individual_array,
+                         order_length_quantities=order_length_quantities, pattern_index=pattern_index,
+                         pattern_generator=pattern_generator)
+    else:
+        toolbox.register('individualFunction', functions_GA.create_individual,
+                         order_length_quantities=order_length_quantities, pattern_index=pattern_index,
+                         pattern_generator=pattern_generator)
+
+    # Register the "individualCreator" function in the toolbox This function creates an individual by calling the
+    # "individualFunction" and using the "initRepeat" function from the "tools" module The created individual is
+    # initialized with the "Individual" class and is repeated once
+    toolbox.register("individualCreator", tools.initRepeat, creator.Individual, toolbox.individualFunction, 1)
+
+    # Register the "population" function in the toolbox This function creates a population of individuals by calling the
+    # "individualCreator" function and using the "initRepeat" function from the "tools" module The created population is
+    # initialized as a list and has a length of POPULATION_SIZE
+    toolbox.register("population", tools.initRepeat, list, toolbox.individualCreator)
 
-# Create the "FitnessMin" fitness class using the base Fitness class
-# Weights are set to -1.0 because we want to minimize the fitness function
-creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+    # Create all individuals of the population at once instead
+    if batch_population and pattern_index is None:
+        toolbox.register("population", functions_GA.create_population, order_length_quantities=order_length_quantities,
+                         pattern_generator=pattern_generator, as_array=representation == "array")
 
-# Create the "Individual" class, which inherits from list and has a fitness attribute
-# The fitness attribute is of type "FitnessMin"
-creator.create("Individual", list, fitness=creator.FitnessMin)
+    # registering the fitness function
+    toolbox.register("evaluate", functions_GA.individualWaste, order_length_quantities=order_length_quantities)
+
+    # registering the fitness function that evaluates a whole batch of individuals at once
+    toolbox.register("evaluateBatch", functions_GA.populationWaste, order_length_quantities=order_length_quantities)
 
+    # Parent selection over the fitness array, or the roulette selection of DEAP
+    if selection == "tournament":
+        toolbox.register("select", functions_selection.selTournamentArray, tournsize=TOURNAMENT_SIZE)
+    elif selection == "sus":
+        toolbox.register("select", functions_selection.selStochasticUniversalArray)
+    elif selection == "roulette":
+        toolbox.register("select", tools.selRoulette)
+    else:
+        raise ValueError(f"Unknown selection {selection!r}, expected 'tournament', 'sus' or 'roulette'")
 
-def crossoverFunction(ind1, ind2, order_length_quantities):
+    # Create operator for crossover
+    toolbox.register("mate", functions_GA.crossoverFunction, order_length_quantities=order_length_quantities,
+                     pattern_index=pattern_index, pattern_generator=pattern_generator)
+
+    # Local search mutation, the time budget is restarted every generation by `eaBatch`
+    toolbox.mutation_budget = functions_GA.TimeBudget(mutation_budget)
+    toolbox.register("mutate", functions_GA.localSearch, order_length_quantities=order_length_quantities,
+                     budget=toolbox.mutation_budget, pattern_generator=pattern_generator)
+
+    # Evaluate and mate in the worker processes of the pool, if one is given
+    if pool is not None:
+        functions_parallel.register_pool(toolbox, pool, workers)
+
+    # Cache the fitness and sanity of individuals by their canonical form, so repeated individuals are not recomputed
+    # The fitness cache is looked up in this process and only the missing individuals are evaluated in the pool, the
+    # sanity is checked in the workers, so the validity cache is only used without a pool
+    if cache_size > 0:
+        toolbox.fitness_cache = functions_cache.FitnessCache(cache_size)
+        toolbox.register("evaluateBatch", functions_GA.populationWasteCached,
+                         order_length_quantities=order_length_quantities, cache=toolbox.fitness_cache,
+                         evaluate=None if pool is None else toolbox.evaluateBatch)
+
+        if pool is None:
+            toolbox.validity_cache = functions_cache.FitnessCache(cache_size)
+            toolbox.register("mate", functions_GA.crossoverFunction, order_length_quantities=order_length_quantities,
+                             validity_cache=toolbox.validity_cache, pattern_index=pattern_index,
+                             pattern_generator=pattern_generator)
+
+    # Time the operators as stages of the metrics, the crossover includes its repair and validation
+    if metrics:
+        functions_metrics.instrument(toolbox, {"population": "initialization", "evaluateBatch": "evaluation",
+                                               "select": "selection", "mate": "crossover", "mutate": "mutation"})
+
+    return toolbox
+
+
+def pastDeadline(deadline) -> bool:
     """
-    This function creates offspring from two parent individuals by calling the `createOffspring` function and passing in
-    the patterns of the parent individuals as arguments. It then creates new `Individual` objects using the offspring
-    patterns and sets their fitness attributes.
+    This function checks whether a deadline has passed.
 
     Parameters:
-    ind1 (Individual): The first parent individual.
-    ind2 (Individual): The second parent individual.
+    deadline (float): The `time.perf_counter` value of the deadline, None if there is no deadline.
 
     Returns:
-        tuple: A tuple containing the two offspring `Individual` objects.
+        bool: True if the deadline has passed.
     """
-    offsprings = []
+    return deadline is not None and time.perf_counter() >= deadline
 
-    while len(offsprings) < 2:
-        offspring = functions_GA.createOffspring(ind1[0], ind2[0], order_length_quantities=order_length_quantities)
 
-        # create a new Individual object and set its fitness attribute
-        offspring_individual = creator.Individual([offspring])
+def evaluateInvalid(individuals, toolbox, deadline=None):
+    """
+    This function evaluates all individuals with an invalid fitness in one call of `toolbox.evaluateBatch` and assigns
+    the resulting fitness values. With a deadline, the individuals are evaluated in slices of DEADLINE_SLICE, and the
+    evaluation is abandoned when the deadline has passed before a slice.
 
-        offsprings.append(offspring_individual)
+    Parameters:
+    individuals (list): The individuals to evaluate.
+    toolbox (Toolbox): The toolbox with the registered "evaluateBatch" function.
+    deadline (float): The `time.perf_counter` value at which the evaluation is abandoned, optional.
 
-        # Sanity check
-        sanity = functions_GA.sanityCheck(order_length_quantities=order_length_quantities,
-                                          population=offspring_individual)
-        # nr_of_bases = functions_GA.sum_baseLength(offspring_individual[0])
+    Returns:
+        int: The number of evaluated individuals, None if the evaluation was abandoned at the deadline.
+    """
+    invalid_ind = [ind for ind in individuals if not ind.fitness.valid]
+    if not invalid_ind:
+        return 0
 
-        if not sanity:
-            print('False offspring created')
+    size = len(invalid_ind) if deadline is None else DEADLINE_SLICE
+    for start in range(0, len(invalid_ind), size):
+        if pastDeadline(deadline):
+            return None
 
-    return offsprings[0], offsprings[1]
+        batch = invalid_ind[start:start + size]
+        fitnesses = toolbox.evaluateBatch(batch).tolist()
+        for ind, fit in zip(batch, fitnesses):
+            ind.fitness.values = (fit,)
 
+        if functions_metrics.current is not None:
+            functions_metrics.count('evaluated_individuals', len(batch))
+            functions_metrics.count('evaluated_patterns', sum(len(ind[0]) for ind in batch))
 
-def create_toolbox(order_length_quantities):
-    # Initialize the toolbox
-    toolbox = base.Toolbox()
+    return len(invalid_ind)
 
-    # Register the "individualFunction" function in the toolbox
-    # This function creates an individual by calling the "create_individual" function from the "functions" module
-    # It takes in the "objects" and "base_length" data as arguments
-    toolbox.register('individualFunction', functions_GA.create_individual,
-                     order_length_quantities=order_length_quantities)
 
-    # Register the "individualCreator" function in the toolbox This function creates an individual by calling the
-    # "individualFunction" and using the "initRepeat" function from the "tools" module The created individual is
-    # initialized with the "Individual" class and is repeated once
-    toolbox.register("individualCreator", tools.initRepeat, creator.Individual, toolbox.individualFunction, 1)
+def createPopulation(toolbox, n, deadline=None, size=DEADLINE_SLICE):
+    """
+    This function creates the initial population with `toolbox.population`. With a deadline, the sorted first
+    individual is created first and the rest of the population in slices, until the population is complete or the
+    deadline has passed, so a time limited run always has at least one individual.
 
-    # Register the "population" function in the toolbox This function creates a population of individuals by calling the
-    # "individualCreator" function and using the "initRepeat" function from the "tools" module The created population is
-    # initialized as a list and has a length of POPULATION_SIZE
-    toolbox.register("population", tools.initRepeat, list, toolbox.individualCreator)
+    Parameters:
+    toolbox (Toolbox): The toolbox with the "population" function.
+    n (int): The size of the population.
+    deadline (float): The `time.perf_counter` value after which no slice is created, optional.
+    size (int): The number of individuals per slice.
 
-    # registering the fitness function
-    toolbox.register("evaluate", functions_GA.individualWaste, order_length_quantities=order_length_quantities)
+    Returns:
+        list: The population, with fewer than n individuals if the deadline has passed.
+    """
+    if deadline is None:
+        return toolbox.population(n=n)
 
-    # Roulette selection
-    toolbox.register("select", tools.selRoulette)
+    population = toolbox.population(n=min(n, 1))
+    while len(population) < n and not pastDeadline(deadline):
+        population += toolbox.population(n=min(size, n - len(population)))
 
-    # Create operator for crossover
-    toolbox.register("mate", crossoverFunction, order_length_quantities=order_length_quantities)
+    return population
 
-    return toolbox
 
+def varAndDeadline(population, toolbox, cxpb, mutpb, deadline):
+    """
+    This function applies crossover and mutation like `algorithms.varAnd`, with the same random sequence, but the
+    variation is abandoned as soon as the deadline has passed after a clone, crossover or mutation.
 
-@functions_GA.measure_time
-def GA(order_length_quantities):
+    Parameters:
+    population (list): The individuals to vary.
+    toolbox (Toolbox): The toolbox with the "mate" and "mutate" functions.
+    cxpb (float): The probability of mating two individuals.
+    mutpb (float): The probability of mutating an individual.
+    deadline (float): The `time.perf_counter` value at which the variation is abandoned.
+
+    Returns:
+        list: The varied individuals, None if the variation was abandoned at the deadline.
     """
-    This is the main Genetic Algorithm function which performs the flow of the algorithm and plots the statistics of the
-    fitness values.
+    # Cloning a large population takes a while, so the deadline is also checked between the clones
+    offspring = []
+    for ind in population:
+        offspring.append(toolbox.clone(ind))
+        if pastDeadline(deadline):
+            return None
+
+    for i in range(1, len(offspring), 2):
+        if random.random() < cxpb:
+            offspring[i - 1], offspring[i] = toolbox.mate(offspring[i - 1], offspring[i])
+            del offspring[i - 1].fitness.values, offspring[i].fitness.values
+
+            if pastDeadline(deadline):
+                return None
+
+    for i in range(len(offspring)):
+        if random.random() < mutpb:
+            offspring[i], = toolbox.mutate(offspring[i])
+            del offspring[i].fitness.values
+
+            if pastDeadline(deadline):
+                return None
+
+    return offspring
+
+
+def eaBatch(population, toolbox, cxpb, mutpb, ngen, stats=None, halloffame=None, verbose=__debug__,
+            remove_duplicates=REMOVE_DUPLICATES, target=None, stall=None, elite=0, deadline=None, callback=None):
+    """
+    This function performs the generational loop of the Genetic Algorithm. It follows `algorithms.eaSimple`, with the
+    same selection, variation, logbook, statistics and hall-of-fame behaviour, but the offspring of every generation
+    are evaluated in one batch by `evaluateInvalid` instead of one `toolbox.evaluate` call per individual. The loop
+    stops before `ngen` generations when the target is reached, the best fitness stalls, the deadline has passed or the
+    callback asks to stop. A generation whose variation or evaluation is still running at the deadline is abandoned,
+    and the population of the last complete generation is returned. The elite individuals are copied into the next
+    generation without variation, and the rest of the generation is selected and varied.
+
+    Parameters:
+    population (list): The initial population.
+    toolbox (Toolbox): The toolbox with the evolution operators.
+    cxpb (float): The probability of mating two individuals.
+    mutpb (float): The probability of mutating an individual.
+    ngen (int): The number of generations.
+    stats (Statistics): The statistics object that is updated in place, optional.
+    halloffame (HallOfFame): The hall-of-fame that contains the best individuals, optional.
+    verbose (bool): Whether to print the statistics of every generation.
+    remove_duplicates (bool): Whether to replace duplicate offspring by new individuals before the evaluation.
+    target (float): Stop as soon as the best fitness is at or below this value, for example the lower bound, optional.
+    stall (int): Stop when the best fitness has not improved for this many generations, optional.
+    elite (int): The number of best individuals that are copied into the next generation.
+    deadline (float): The `time.perf_counter` value after which no generation is started or completed, optional.
+    callback (function): Called after every generation as callback(gen, population, halloffame, logbook), the loop
+    stops if it returns True, optional.
 
     Returns:
-        None
+        tuple: The final population and the logbook of the evolution.
     """
-    # Measure time
-    time.sleep(1)
+    logbook = tools.Logbook()
+    logbook.header = ['gen', 'nevals'] + (['duplicates'] if remove_duplicates else []) + (stats.fields if stats else [])
+
+    # Evaluate the individuals with an invalid fitness
+    nevals = evaluateInvalid(population, toolbox)
+
+    if halloffame is not None:
+        halloffame.update(population)
+
+    record = stats.compile(population) if stats else {}
+    logbook.record(gen=0, nevals=nevals, **record)
+    if verbose:
+        print(logbook.stream)
+
+    if callback is not None and callback(0, population, halloffame, logbook):
+        return population, logbook
+
+    best_fitness = min(ind.fitness.values[0] for ind in population)
+    last_improvement = 0
+
+    # Begin the generational process
+    for gen in range(1, ngen + 1):
+        # Stop when the best individual is known to be optimal, or has not improved within the stall window
+        if target is not None and best_fitness <= target:
+            break
+        if stall is not None and gen - 1 - last_improvement >= stall:
+            break
+        if pastDeadline(deadline):
+            break
+
+        # Select and vary the next generation individuals
+        if hasattr(toolbox, "mutation_budget"):
+            toolbox.mutation_budget.restart(deadline)
+        elites = [toolbox.clone(ind) for ind in functions_selection.selBestArray(population, elite)]
+        offspring = toolbox.select(population, len(population) - len(elites))
+        with functions_metrics.stage("variation"):
+            if hasattr(toolbox, "mateParallel"):
+                offspring = functions_parallel.varAndParallel(offspring, toolbox, cxpb, mutpb, deadline=deadline)
+            elif deadline is None:
+                offspring = algorithms.varAnd(offspring, toolbox, cxpb, mutpb)
+            else:
+                offspring = varAndDeadline(offspring, toolbox, cxpb, mutpb, deadline)
+
+        # Abandon the generation if the deadline passed during its variation
+        if offspring is None:
+            break
+
+        # Replace the offspring that are clones of other offspring
+        if remove_duplicates:
+            duplicates = functions_cache.replaceDuplicates(offspring, toolbox.individualCreator)
+            functions_metrics.count('duplicates', duplicates)
+
+        # Evaluate the offspring with an invalid fitness as one batch, and abandon the generation at the deadline
+        nevals = evaluateInvalid(offspring, toolbox, deadline=deadline)
+        if nevals is None:
+            break
+
+        # Update the hall of fame with the generated individuals
+        if halloffame is not None:
+            halloffame.update(offspring)
 
-    # Create the toolbox
-    toolbox = create_toolbox(order_length_quantities=order_length_quantities)
+        # Replace the current population by the elite and the offspring
+        population[:] = elites + offspring
 
-    # Create the initial population (generation 0)
-    population = toolbox.population(n=POPULATION_SIZE)
+        # Append the current generation statistics to the logbook
+        record = stats.compile(population) if stats else {}
+        if remove_duplicates:
+            record['duplicates'] = duplicates
+        logbook.record(gen=gen, nevals=nevals, **record)
+        if verbose:
+            print(logbook.stream)
 
-    # Prepare the statistics object
-    stats = tools.Statistics(lambda ind: ind.fitness.values)
-    stats.register("min", np.min)
-    stats.register("avg", np.mean)
+        generation_best = min(ind.fitness.values[0] for ind in population)
+        if generation_best < best_fitness:
+            best_fitness = generation_best
+            last_improvement = gen
+
+        if callback is not None and callback(gen, population, halloffame, logbook):
+            break
 
-    # Define the hall-of-fame object
-    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+    return population, logbook
 
-    # Perform the Genetic Algorithm flow with the hof feature added
-    population, logbook = algorithms.eaSimple(population, toolbox, cxpb=P_CROSSOVER, mutpb=0,
-                                              ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
 
-    # Print the best solution found
-    best = hof.items[0]
+def bestSolution(hof, order_length_quantities, verbose=None):
+    """
+    This function selects the best valid solution of the hall of fame and prints its characteristics.
+
+    Parameters:
+    hof (HallOfFame): The hall of fame of the Genetic Algorithm.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    verbose (bool): Whether to print the characteristics of the solution, by default VERBOSE.
 
-    # Print the best solution found
+    Returns:
+        tuple: The waste, material and number of base panels of the best solution, None if no solution is valid.
+    """
+    verbose = VERBOSE if verbose is None else verbose
+    best = None
+
+    # Select the best valid solution found
     for solution in hof.items:
-        sanity = functions_GA.sanityCheck(order_length_quantities=order_length_quantities, population=solution)
+        sanity = functions_GA.demandCheck(order_length_quantities, solution[0])
 
         if sanity:
             best = solution
             break
-        else:
+        elif verbose:
             print('Invalid solution found')
 
     if best is None:
-        print('No valid solution found')
-        return
+        if verbose:
+            print('No valid solution found')
+        return None
 
     # Define the best individuals' characteristics
     N_nr_of_bases = functions_GA.sum_baseLength(best[0])
@@ -161,12 +430,297 @@ def GA(order_length_quantities):
     #    return None
 
     # Print the best individual's characteristics
-    print("-- Best Ever Individual = ", best)
-    print("-- Best Ever Fitness (Material used) = ", N_material)
-    print("-- Total Waste = ", N_waste)
-    print("-- Number of Base Lengths = ", N_nr_of_bases)
-    print("-- Number of Patterns = ", nr_of_patters)
-    print("-- Sanity Check of Individual = ", sanity)
+    if verbose:
+        print("-- Best Ever Individual = ", best)
+        print("-- Best Ever Fitness (Material used) = ", N_material)
+        print("-- Total Waste = ", N_waste)
+        print("-- Number of Base Lengths = ", N_nr_of_bases)
+        print("-- Number of Patterns = ", nr_of_patters)
+        print("-- Sanity Check of Individual = ", sanity)
+
+    return N_waste, N_material, N_nr_of_bases
+
+
+def withLowerBound(result, bound, verbose=None):
+    """
+    This function adds the lower bound and the optimality gap, in base panels, to the result of an engine and prints
+    them.
+
+    Parameters:
+    result (tuple): The waste, material and number of base panels of the best solution, or None.
+    bound (int): The lower bound on the number of base panels.
+    verbose (bool): Whether to print the lower bound and the gap, by default VERBOSE.
+
+    Returns:
+        tuple: The waste, material, number of base panels, lower bound and gap, None if the result is None.
+    """
+    verbose = VERBOSE if verbose is None else verbose
+    if result is None:
+        return None
+
+    N_waste, N_material, N_nr_of_bases = result
+    gap = N_nr_of_bases - bound
+
+    if verbose:
+        print("-- Lower Bound (Number of Base Lengths) = ", bound)
+        print("-- Optimality Gap (Number of Base Lengths) = ", gap)
+
+    return N_waste, N_material, N_nr_of_bases, bound, gap
+
+
+class Solution:
+    """
+    This class holds the result of `solve`: the best valid solution found, its characteristics, the lower bound and
+    the effort that was spent on it. The patterns are None if no valid solution was found.
+    """
+
+    def __init__(self, patterns, material, waste, nr_of_bases, lower_bound, generations, elapsed, halloffame=None,
+                 statistics=None):
+        self.patterns = patterns
+        self.material = material
+        self.waste = waste
+        self.nr_of_bases = nr_of_bases
+        self.lower_bound = lower_bound
+        self.gap = None if nr_of_bases is None else nr_of_bases - lower_bound
+        self.generations = generations
+        self.elapsed = elapsed
+        self.halloffame = halloffame
+        self.statistics = statistics or {}
+
+    @property
+    def valid(self) -> bool:
+        return self.patterns is not None
+
+    @property
+    def optimal(self) -> bool:
+        return self.gap == 0
+
+    def result(self):
+        """
+        This function returns the solution in the form of the result of the engines of `OptimizeDay`.
+
+        Returns:
+            tuple: The waste, material, number of base panels, lower bound and gap, None if the solution is not valid.
+        """
+        if not self.valid:
+            return None
+
+        return self.waste, self.material, self.nr_of_bases, self.lower_bound, self.gap
+
+    def __repr__(self):
+        return (f"Solution(nr_of_bases={self.nr_of_bases}, lower_bound={self.lower_bound}, gap={self.gap}, "
+                f"material={self.material}, waste={self.waste}, generations={self.generations}, "
+                f"elapsed={self.elapsed:.3f})")
+
+
+def solve(order_length_quantities, time_limit=None, target=None, callback=None, representation=REPRESENTATION,
+          workers=N_WORKERS, use_pattern_index=USE_PATTERN_INDEX, use_pattern_generator=USE_PATTERN_GENERATOR,
+          max_generations=None, population_size=None, adaptive=ADAPTIVE_SCHEDULE, metrics=METRICS, verbose=False):
+    """
+    This function solves a subset with the Genetic Algorithm within a time limit and returns the best valid solution
+    found. The pattern index stops its enumeration at the time limit, and once the limit has expired the schedule and
+    the worker pool are skipped. The initial population starts with the sorted first individual, and no further slice
+    of it is created after the time limit. A generation whose variation or evaluation is still running at the time
+    limit is abandoned. The time limit is therefore exceeded by at most the first individual, one slice of the initial
+    population and its evaluation, or one crossover, local search move or evaluation slice, next to the lower bound and
+    the schedule of a subset whose setup starts before the limit. The search also stops when the target number of base
+    panels is reached, or when the best solution stalls. With the adaptive schedule, the population size and number of
+    generations that are not given are sized by the difficulty of the subset.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    time_limit (float): The wall-clock budget in seconds, optional.
+    target (int): Stop when a solution with at most this number of base panels is found, by default the lower bound.
+    callback (function): Called after every generation as callback(gen, population, halloffame, logbook), the search
+    stops if it returns True, optional. Every generation is also written to the progress log, if one is streamed.
+    representation (str): The encoding of an individual, "list" or "array".
+    workers (int): The number of worker processes for the evaluation and crossover.
+    use_pattern_index (bool): Whether to take patterns from the pattern index of the subset.
+    use_pattern_generator (bool): Whether to take repair patterns from the knapsack pattern generator.
+    max_generations (int): The maximum number of generations, by default the scheduled or MAX_GENERATIONS without a
+    time limit and no maximum with a time limit.
+    population_size (int): The size of the population, by default the scheduled size or POPULATION_SIZE.
+    adaptive (bool): Whether to schedule the population size and number of generations by the subset features.
+    metrics (bool): Whether to collect the metrics of the run, see functions_metrics.
+    verbose (bool): Whether to print the statistics of every generation.
+
+    Returns:
+        Solution: The best valid solution found.
+    """
+    start = time.perf_counter()
+    deadline = None if time_limit is None else start + time_limit
+    diagnostics = functions_GA.diagnostics.copy()
+
+    # Start every run with the sorted first individual, regardless of the runs before it in this process
+    functions_GA.rer_one = True
+
+    # The lower bound on the number of base panels, the GA stops when the best individual reaches it
+    bound = functions_bounds.lower_bound(order_length_quantities, functions_GA.base_length)
+    if target is None:
+        target = bound
+
+    # Enumerate the maximal feasible patterns of the subset once, as far as the time limit allows
+    pattern_index = None
+    if use_pattern_index and not pastDeadline(deadline):
+        pattern_index = functions_patterns.PatternIndex(order_length_quantities, functions_GA.base_length,
+                                                        deadline=deadline)
+
+    # Memoize the knapsack patterns of the residual demands of the subset
+    pattern_generator = None
+    if use_pattern_generator:
+        pattern_generator = functions_patterns.PatternGenerator(order_length_quantities, functions_GA.base_length)
+
+    # Size the run by the difficulty of the subset
+    statistics = {}
+    if adaptive and (population_size is None or (max_generations is None and time_limit is None)) and \
+            not pastDeadline(deadline):
+        features = functions_schedule.instance_features(order_length_quantities, functions_GA.base_length,
+                                                        pattern_generator=pattern_generator, bound=bound)
+        scheduled_population, scheduled_generations = functions_schedule.schedule(
+            features, greedy_first=pattern_generator is not None and pattern_index is None)
+        population_size = scheduled_population if population_size is None else population_size
+        max_generations = scheduled_generations if max_generations is None and time_limit is None else max_generations
+        statistics['schedule'] = dict(features, population_size=population_size, max_generations=max_generations)
+
+    if population_size is None:
+        population_size = POPULATION_SIZE
+    if max_generations is None:
+        max_generations = MAX_GENERATIONS if time_limit is None else sys.maxsize
+
+    # Create the worker pool, which is initialized with the subset
+    pool = None
+    if workers > 1 and not pastDeadline(deadline):
+        pool = functions_parallel.create_pool(order_length_quantities, workers, pattern_index=pattern_index,
+                                              pattern_generator=pattern_generator, metrics=metrics)
+
+    # Time the stages and count the events of the run
+    collector = functions_metrics.collect() if metrics else contextlib.nullcontext()
+    with collector as run_metrics:
+        try:
+            # Create the toolbox
+            toolbox = create_toolbox(order_length_quantities=order_length_quantities, representation=representation,
+                                     pool=pool, workers=workers, pattern_index=pattern_index,
+                                     pattern_generator=pattern_generator, metrics=metrics)
+
+            # Create the initial population (generation 0), one by one if the individuals are not created at once
+            population = createPopulation(toolbox, population_size, deadline=deadline,
+                                          size=DEADLINE_SLICE if BATCH_POPULATION and pattern_index is None else 1)
+
+            # Prepare the statistics object
+            stats = tools.Statistics(lambda ind: ind.fitness.values)
+            stats.register("min", np.min)
+            stats.register("avg", np.mean)
+
+            # Define the hall-of-fame object
+            hof = tools.HallOfFame(HALL_OF_FAME_SIZE, similar=functions_GA.equalIndividuals)
+
+            # Perform the Genetic Algorithm flow with the hof feature added
+            population, logbook = eaBatch(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                          ngen=max_generations, stats=stats, halloffame=hof, verbose=verbose,
+                                          target=target * functions_GA.base_length, stall=STALL_GENERATIONS,
+                                          elite=ELITE_SIZE, deadline=deadline,
+                                          callback=functions_progress.with_progress(callback))
+        finally:
+            if pool is not None:
+                # Do not wait for the crossovers of a generation that was abandoned at the time limit
+                if pastDeadline(deadline):
+                    pool.terminate()
+                else:
+                    pool.close()
+                pool.join()
+
+        statistics['diagnostics'] = dict(functions_GA.diagnostics - diagnostics)
+        if hasattr(toolbox, "fitness_cache"):
+            statistics['fitness_cache'] = toolbox.fitness_cache.statistics()
+        if hasattr(toolbox, "validity_cache"):
+            statistics['validity_cache'] = toolbox.validity_cache.statistics()
+        if pattern_generator is not None and pool is None:
+            statistics['pattern_cache'] = pattern_generator.cache.statistics()
+
+        # Add the diagnostics and cache statistics of the run to its counters
+        if run_metrics is not None:
+            run_metrics.counters.update(statistics['diagnostics'])
+            for cache in ('fitness_cache', 'pattern_cache'):
+                if cache in statistics:
+                    run_metrics.counters[f'{cache}_hits'] += statistics[cache]['hits']
+                    run_metrics.counters[f'{cache}_misses'] += statistics[cache]['misses']
+            statistics['metrics'] = run_metrics.to_dict()
+
+    # The best individual of the hall of fame that cuts exactly the demand
+    best = next((ind for ind in hof.items if functions_GA.demandCheck(order_length_quantities, ind[0])), None)
+
+    # Without a valid individual in the hall of fame, the sorted first individual is the solution if it is valid
+    if best is None:
+        functions_GA.rer_one = True
+        first = creator.Individual([functions_GA.create_individual(order_length_quantities,
+                                                                   pattern_generator=pattern_generator)])
+        if functions_GA.demandCheck(order_length_quantities, first[0]):
+            first.fitness.values = tuple(functions_GA.populationWaste([first], order_length_quantities).tolist())
+            best = first
+
+    elapsed = time.perf_counter() - start
+
+    if best is None:
+        return Solution(None, None, None, None, bound, len(logbook) - 1, elapsed, halloffame=hof,
+                        statistics=statistics)
+
+    patterns = functions_GA.array_to_individual(best[0]) if isinstance(best[0], np.ndarray) else best[0]
+
+    return Solution(patterns, best.fitness.values[0], functions_GA.CalcWaste(best, order_length_quantities),
+                    functions_GA.sum_baseLength(best[0]), bound, len(logbook) - 1, elapsed, halloffame=hof,
+                    statistics=statistics)
+
+
+@functions_GA.measure_time
+def GA(order_length_quantities, representation=REPRESENTATION, workers=N_WORKERS,
+       use_pattern_index=USE_PATTERN_INDEX, use_pattern_generator=USE_PATTERN_GENERATOR, verbose=None):
+    """
+    This is the main Genetic Algorithm function which performs the flow of the algorithm with `solve` and, if verbose,
+    prints the statistics of the fitness values and the best solution. With more than one worker, the evaluation and crossover
+    run in a process pool. With the pattern index, the initial population and the crossover repair take their patterns
+    from the precomputed index. With the pattern generator, the crossover repair and the first individual take the
+    knapsack pattern with the least waste. The result is the solution that `solve` selected, the best valid
+    individual of the hall of fame or the first individual.
+
+    Returns:
+        tuple: The waste, material, number of base panels, lower bound and gap of the best solution, None if neither
+        the hall of fame nor the first individual is valid.
+    """
+    # Read VERBOSE at call time, so it can be switched off after the import
+    verbose = VERBOSE if verbose is None else verbose
+
+    solution = solve(order_length_quantities, representation=representation, workers=workers,
+                     use_pattern_index=use_pattern_index, use_pattern_generator=use_pattern_generator,
+                     verbose=verbose)
+
+    if verbose:
+        if 'schedule' in solution.statistics:
+            print("-- Schedule = ", solution.statistics['schedule'])
+        print("-- Diagnostics = ", solution.statistics['diagnostics'])
+        if 'fitness_cache' in solution.statistics:
+            print("-- Fitness Cache = ", solution.statistics['fitness_cache'])
+        if 'validity_cache' in solution.statistics:
+            print("-- Validity Cache = ", solution.statistics['validity_cache'])
+        if 'pattern_cache' in solution.statistics:
+            print("-- Pattern Cache = ", solution.statistics['pattern_cache'])
+
+    # The best valid solution that solve selected, which can be the first individual when no hall of fame entry is valid
+    if not solution.valid:
+        if verbose:
+            print('No valid solution found')
+        return None
+
+    # Print the best solution's characteristics
+    if verbose:
+        print("-- Best Ever Individual = ", solution.patterns)
+        print("-- Best Ever Fitness (Material used) = ", solution.material)
+        print("-- Total Waste = ", solution.waste)
+        print("-- Number of Base Lengths = ", solution.nr_of_bases)
+        print("-- Number of Patterns = ", len(solution.patterns))
+        print("-- Sanity Check of Individual = ", solution.valid)
+
+    result = withLowerBound((solution.waste, solution.material, solution.nr_of_bases), solution.lower_bound,
+                            verbose=verbose)
 
     # Extract the statistics
     # minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
@@ -180,56 +734,387 @@ def GA(order_length_quantities):
     # plt.title('Min and Average fitness over Generations')
     # plt.show()
 
-    return N_waste, N_material, N_nr_of_bases
+    return result
+
+
+def runIsland(index, order_length_quantities, population_size, ngen, migration_interval, migrants, inbox, outbox,
+              results, seed, progress_path=None, progress_keys=None):
+    """
+    This function evolves one island population of the island model in a worker process. After every migration
+    interval, the best individuals are sent to the next island and the worst individuals are replaced by the
+    individuals received from the previous island. The hall of fame, the logbook and the metrics of the island are
+    returned via the results queue, since the metrics of this process are not seen by the parent process. The statistics
+    of every generation are written to the progress log with the index of the island, if one is given. If the island
+    fails, the traceback is sent via the results queue instead of the hall of fame, as (index, None, traceback, None).
+
+    Parameters:
+    index (int): The index of the island in the ring.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    population_size (int): The size of the island population.
+    ngen (int): The number of generations.
+    migration_interval (int): The number of generations between two migrations.
+    migrants (int): The number of individuals that migrate.
+    inbox (Queue): The queue with the migrants from the previous island.
+    outbox (Queue): The queue with the migrants to the next island.
+    results (Queue): The queue for the hall of fame, the logbook and the metrics of the island.
+    seed (int): The seed of the random generator of the island.
+    progress_path (str): The JSON lines file of the progress log, optional.
+    progress_keys (dict): The keys of the subset in the progress log, such as the date and the subset.
+
+    Returns:
+        None
+    """
+    try:
+        random.seed(seed)
+        functions_GA.setup_creator()
+
+        # Every island starts with the sorted first individual
+        functions_GA.rer_one = True
+
+        # The metrics and diagnostics of the island process are sent to the parent process with the results
+        island_metrics = functions_metrics.Metrics() if METRICS else None
+        functions_metrics.current = island_metrics
+        diagnostics = functions_GA.diagnostics.copy()
+
+        pattern_generator = None
+        if USE_PATTERN_GENERATOR:
+            pattern_generator = functions_patterns.PatternGenerator(order_length_quantities, functions_GA.base_length)
+
+        toolbox = create_toolbox(order_length_quantities=order_length_quantities, pattern_generator=pattern_generator)
+        population = toolbox.population(n=population_size)
+
+        stats = tools.Statistics(lambda ind: ind.fitness.values)
+        stats.register("min", np.min)
+        stats.register("avg", np.mean)
+
+        hof = tools.HallOfFame(HALL_OF_FAME_SIZE, similar=functions_GA.equalIndividuals)
 
+        logbook = tools.Logbook()
+        logbook.header = ['gen', 'island', 'nevals'] + stats.fields
+        gen = 0
 
-def OptimizeDay(data_day, date):
+        # Number the generations of the epoch from the start of the run, generation 0 is only logged once
+        def progress_callback(epoch_gen, epoch_population, epoch_halloffame, epoch_logbook):
+            if gen == 0 or epoch_gen > 0:
+                progress.generation(gen + epoch_gen, epoch_population, epoch_halloffame, epoch_logbook)
+            return False
 
-    subsets = functions_dataprep.panel_count(data_day)
-    dict_subsets = functions_dataprep.create_subsets(data_day, subsets)
-    day_subsets = functions_dataprep.list_subsets(dict_subsets)
-    lookup = pd.DataFrame()
-    lookup['Key'] = dict_subsets.keys()
+        with functions_progress.stream(progress_path, **dict(progress_keys or {}, island=index)) as progress:
+            while gen < ngen or gen == 0:
+                epoch = min(migration_interval, ngen - gen)
+                population, epoch_logbook = eaBatch(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION, ngen=epoch,
+                                                    stats=stats, halloffame=hof, verbose=False, elite=ELITE_SIZE,
+                                                    callback=None if progress is None else progress_callback)
 
-    df_results = pd.DataFrame(columns=["Subset", "O_material", "N_material", "O_waste", "N_waste", "O_panels", "N_panels"])
+                for record in epoch_logbook:
+                    if gen == 0 or record['gen'] > 0:
+                        logbook.record(island=index, **dict(record, gen=gen + record['gen']))
+                gen += epoch
+
+                if gen >= ngen:
+                    break
+
+                # Send the best individuals to the next island and replace the worst individuals by the received ones
+                outbox.put([toolbox.clone(ind) for ind in tools.selBest(population, migrants)])
+                immigrants = inbox.get()
+
+                worst = sorted(range(len(population)), key=lambda i: population[i].fitness)[:len(immigrants)]
+                for i, immigrant in zip(worst, immigrants):
+                    population[i] = immigrant
+    except Exception:
+        # Report the error to the parent process, which stops the other islands and raises it
+        results.put((index, None, traceback.format_exc(), None))
+        raise
+
+    if island_metrics is not None:
+        island_metrics.counters.update(functions_GA.diagnostics - diagnostics)
+
+    results.put((index, list(hof), logbook, island_metrics))
+
+
+@functions_GA.measure_time
+def GA_islands(order_length_quantities, islands=N_ISLANDS, migration_interval=MIGRATION_INTERVAL,
+               migrants=N_MIGRANTS, population_size=None):
+    """
+    This is the island model variant of the Genetic Algorithm. It evolves several independent populations in separate
+    processes, which exchange their best individuals in a ring every migration interval. The halls of fame of the
+    islands are merged at the end. The islands run all generations without early stopping, so every island takes part
+    in every migration. If an island fails or is killed, the other islands are stopped and a RuntimeError is raised.
+    It cannot run inside the subset pool of `OptimizeDay`, whose workers cannot start processes of
+    their own, so `solveSubset` optimizes those subsets with the GA instead.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    islands (int): The number of islands.
+    migration_interval (int): The number of generations between two migrations.
+    migrants (int): The number of individuals that migrate.
+    population_size (int): The size of every island population, by default POPULATION_SIZE divided over the islands.
+
+    Returns:
+        tuple: The waste, material, number of base panels, lower bound and gap of the best solution, None if no solution
+        is valid.
+    """
+    if population_size is None:
+        population_size = max(2, POPULATION_SIZE // islands)
+
+    # Island i receives its migrants in queue i, and sends them to the queue of the next island
+    queues = [multiprocessing.Queue() for _ in range(islands)]
+    results = multiprocessing.Queue()
+
+    # The islands log their generations to the progress log of the subset
+    progress = functions_progress.current
+    progress_path = None if progress is None else progress.path
+    progress_keys = None if progress is None else progress.keys
+
+    processes = [multiprocessing.Process(target=runIsland,
+                                         args=(i, order_length_quantities, population_size, MAX_GENERATIONS,
+                                               migration_interval, migrants, queues[i], queues[(i + 1) % islands],
+                                               results, random.getrandbits(32), progress_path, progress_keys))
+                 for i in range(islands)]
+    for process in processes:
+        process.start()
+
+    # Collect the results before joining, a process cannot exit while its results are still in the queue
+    island_results = {}
+    try:
+        while len(island_results) < islands:
+            try:
+                index, island_hof, island_logbook, island_metrics = results.get(timeout=ISLAND_POLL_SECONDS)
+            except queue.Empty:
+                # An island that stopped without sending its results was killed, for example by the system
+                stopped = [i for i, process in enumerate(processes)
+                           if i not in island_results and not process.is_alive()]
+                if stopped and results.empty():
+                    raise RuntimeError(f"Island {stopped[0]} stopped with exit code {processes[stopped[0]].exitcode} "
+                                       f"without sending its results")
+                continue
+
+            if island_hof is None:
+                raise RuntimeError(f"Island {index} failed:\n{island_logbook}")
+            island_results[index] = (island_hof, island_logbook)
+            functions_metrics.merge(island_metrics)
+    finally:
+        # The other islands of a failed run would wait for the migrants of the failed island forever
+        if len(island_results) < islands:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+        for process in processes:
+            process.join()
+
+    # Merge the halls of fame of the islands
+    hof = tools.HallOfFame(HALL_OF_FAME_SIZE, similar=functions_GA.equalIndividuals)
+    for _, (island_hof, island_logbook) in sorted(island_results.items()):
+        hof.update(island_hof)
+        if VERBOSE:
+            print(island_logbook)
+
+    bound = functions_bounds.lower_bound(order_length_quantities, functions_GA.base_length)
+
+    return withLowerBound(bestSolution(hof, order_length_quantities), bound)
+
+
+# The engines that can optimize a subset, by name
+ENGINES = {"GA": GA, "islands": GA_islands, "CG": CG_CSP.CG}
+
+
+def selectEngine(engine, order_length_quantities):
+    """
+    This function returns the name of the engine that optimizes the given subset.
+
+    Parameters:
+    engine (str): The name of the engine, or a function that returns the name for the order length quantities.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+
+    Returns:
+        str: The name of the engine, one of the keys of ENGINES.
+    """
+    name = engine(order_length_quantities) if callable(engine) else engine
+
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine {name!r}, expected one of {list(ENGINES)}")
+
+    return name
+
+
+def solveSubset(order_length_quantities, seed, engine=ENGINE, progress_path=None, progress_keys=None):
+    """
+    This function optimizes one subset in a worker process of the subset pool. The random generator is seeded per
+    subset, so the result does not depend on which worker solves the subset. The Genetic Algorithm itself runs in a
+    single process, because the workers of a pool cannot start a pool of their own. For the same reason the island
+    model falls back to the Genetic Algorithm in the subset pool.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    seed (int): The seed of the random generator for this subset.
+    engine (str): The name of the engine, or a function that returns the name for the order length quantities.
+    progress_path (str): The JSON lines file of the progress log, optional.
+    progress_keys (dict): The keys of the subset in the progress log, such as the date and the subset.
+
+    Returns:
+        tuple: The waste, material, number of base panels, lower bound and gap of the best solution, and the metrics
+        of the subset, None if no metrics are collected.
+    """
+    random.seed(seed)
+
+    # Start every subset with the sorted first individual, regardless of the subsets solved before in this worker
+    functions_GA.rer_one = True
+
+    with functions_metrics.collect() if METRICS else contextlib.nullcontext() as subset_metrics, \
+            functions_progress.stream(progress_path, **(progress_keys or {})):
+        name = selectEngine(engine, order_length_quantities)
+
+        # The workers of the subset pool cannot start the processes of the islands, the subset is optimized by the GA
+        if name == "islands" and multiprocessing.current_process().daemon:
+            if VERBOSE:
+                print("The island model cannot run in the subset pool, the subset is optimized by the GA")
+            name = "GA"
+
+        if name == "GA":
+            result = GA(order_length_quantities, workers=1)
+        else:
+            result = ENGINES[name](order_length_quantities)
+
+    return result, subset_metrics
+
+
+def solveSubsetsParallel(day_subsets, subset_workers, engine=ENGINE, progress_path=None, subset_keys=None):
+    """
+    This function optimizes all subsets of a day in a process pool. The subsets with the most pieces are sent first to
+    balance the load over the workers, and the results are returned in the order of the subsets.
+
+    Parameters:
+    day_subsets (list): The order length quantities of every subset.
+    subset_workers (int): The number of worker processes.
+    engine (str): The name of the engine, or a module level function that returns the name for the order length
+    quantities, so it can be sent to the workers.
+    progress_path (str): The JSON lines file of the progress log, optional.
+    subset_keys (list): The keys of every subset in the progress log, optional.
+
+    Returns:
+        list: The result and the metrics of every subset, see `solveSubset`.
+    """
+    # Draw the seeds in the order of the subsets, so the results are reproducible
+    seeds = [random.getrandbits(32) for _ in day_subsets]
+    order = sorted(range(len(day_subsets)), key=lambda i: sum(day_subsets[i].values()), reverse=True)
+
+    with multiprocessing.Pool(processes=subset_workers) as pool:
+        solutions = pool.starmap(solveSubset, [(day_subsets[i].copy(), seeds[i], engine, progress_path,
+                                                 subset_keys[i] if subset_keys else None) for i in order],
+                                 chunksize=1)
+
+    results = [None] * len(day_subsets)
+    for i, solution in zip(order, solutions):
+        results[i] = solution
+
+    return results
+
+
+def OptimizeDay(data_day, date, subset_workers=SUBSET_WORKERS, engine=ENGINE, metrics_path=METRICS_PATH,
+                progress_path=PROGRESS_PATH):
+
+    # Time the data preparation of the day like the stages of the subsets
+    with functions_metrics.collect() if METRICS else contextlib.nullcontext() as day_metrics:
+        with functions_metrics.stage("dataprep"):
+            # The demand and the original plan of every subset, prepared in one pass over the day
+            prepared_subsets = functions_dataprep.prepare_subsets(data_day)
+    subset_names = list(prepared_subsets.keys())
+    day_subsets = [prepared_subsets[name]['demand'] for name in subset_names]
+
+    df_results = pd.DataFrame(columns=["Subset", "O_material", "N_material", "O_waste", "N_waste", "O_panels", "N_panels",
+                                       "LB_panels", "Gap"])
+    metrics_records = [] if day_metrics is None else [dict(Date=str(date), Subset="", **day_metrics.to_row())]
+
+    # The keys of every subset in the progress log
+    subset_keys = [dict(date=str(date), subset=', '.join(map(str, name))) for name in subset_names]
+
+    # Optimize all subsets at once in a process pool, otherwise they are optimized one by one in the loop
+    solutions = None
+    if subset_workers > 1:
+        solutions = solveSubsetsParallel(day_subsets, subset_workers, engine, progress_path=progress_path,
+                                         subset_keys=subset_keys)
 
     for i in range(len(day_subsets)):
         subset_index = i
         order_length_quantities = day_subsets[subset_index].copy()
-        analyzed_subset, O_nr_of_panels, O_waste, O_material = functions_dataprep.performance_set(data_day,
-                                                                                    lookup.loc[subset_index][0])
-        print(f"Performing GA iteration: {i}")
-        N_waste, N_material, N_nr_of_bases = GA(order_length_quantities)
-        print(f"Optimized subset: {order_length_quantities}")
-        print(
-            f"-- Original Model Results on {date} = Analyzed subset: {analyzed_subset}, Total number of panels: {O_nr_of_panels}"
-            f", Total material "
-            f"used: {O_material}, Total waste: {O_waste}")
-        print(f"Number of subsets: {len(day_subsets)}")
+        with functions_metrics.collect() if METRICS else contextlib.nullcontext() as subset_metrics, \
+                functions_progress.stream(progress_path, **subset_keys[i]) as progress:
+            analyzed_subset = subset_names[subset_index]
+            original_plan = prepared_subsets[analyzed_subset]
+            O_nr_of_panels, O_waste, O_material = (original_plan['O_panels'], original_plan['O_waste'],
+                                                   original_plan['O_material'])
+            if VERBOSE:
+                print(f"Performing GA iteration: {i}")
+            if solutions is None:
+                optimize_subset = ENGINES[selectEngine(engine, order_length_quantities)]
+                N_waste, N_material, N_nr_of_bases, LB_panels, gap = optimize_subset(order_length_quantities)
+            else:
+                (N_waste, N_material, N_nr_of_bases, LB_panels, gap), worker_metrics = solutions[i]
+                if subset_metrics is not None and worker_metrics is not None:
+                    subset_metrics.merge(worker_metrics)
+
+            if progress is not None:
+                progress.write("result", O_material=O_material, N_material=N_material, O_waste=O_waste,
+                               N_waste=N_waste, O_panels=O_nr_of_panels, N_panels=N_nr_of_bases, LB_panels=LB_panels,
+                               Gap=gap)
+        if VERBOSE:
+            print(f"Optimized subset: {order_length_quantities}")
+            print(
+                f"-- Original Model Results on {date} = Analyzed subset: {analyzed_subset}, Total number of panels: {O_nr_of_panels}"
+                f", Total material "
+                f"used: {O_material}, Total waste: {O_waste}")
+            print(f"Number of subsets: {len(day_subsets)}")
 
         subset_string = ', '.join(map(str, analyzed_subset))
 
         new_row = pd.DataFrame(
             {'Subset': [subset_string], 'O_material': [O_material], 'N_material': [N_material], 'O_waste': [O_waste], 'N_waste': [N_waste],
-             'O_panels': [O_nr_of_panels], 'N_panels': [N_nr_of_bases]})
+             'O_panels': [O_nr_of_panels], 'N_panels': [N_nr_of_bases], 'LB_panels': [LB_panels], 'Gap': [gap]})
 
         df_results = pd.concat([df_results, new_row], ignore_index=True)
 
+        if subset_metrics is not None:
+            metrics_records.append(dict(Date=str(date), Subset=subset_string, **subset_metrics.to_row()))
+
+    # Export the metrics of the data preparation and of every subset of the day
+    if metrics_path is not None and metrics_records:
+        functions_metrics.write_records(metrics_records, metrics_path.format(date=date))
+
     return df_results
 
 
-def OptimizeRange(df_production_orders, nr_of_days, days):
+def OptimizeRange(df_production_orders, nr_of_days, days, day_workers=DAY_WORKERS, queue_path=None,
+                  output_dir='results', show=True):
+    """
+    This function optimizes the production days in the dataframe one by one and visualizes the results of every day.
+    With more than one day worker or with a queue path, the days are optimized by the runner in `functions_runner`,
+    which writes the results of every day to the output directory and can resume a stopped run.
+
+    Parameters:
+    df_production_orders (DataFrame): The production orders.
+    nr_of_days (int): The number of days to optimize.
+    days (list): The days to optimize, nr_of_days is ignored if given.
+    day_workers (int): The number of worker processes that optimize days.
+    queue_path (str): The SQLite file of the job queue of the runner, optional.
+    output_dir (str): The directory for the result files of the runner.
+    show (bool): Whether to show the plot of every day, which blocks until the plot is closed.
+
+    Returns:
+        None
+    """
     df_production_orders['ProductieTijd'] = pd.to_datetime(df_production_orders['ProductieTijd'])
     df_production_orders['ProductieTijd'] = df_production_orders['ProductieTijd'].dt.date
     amount_of_days_available = len(df_production_orders['ProductieTijd'].unique())
 
     if amount_of_days_available < nr_of_days:
-        print(f"Not enough days in the dataset. Changing nr_of_days to the number of days in the dataset: "
-              f"{amount_of_days_available}")
+        if VERBOSE:
+            print(f"Not enough days in the dataset. Changing nr_of_days to the number of days in the dataset: "
+                  f"{amount_of_days_available}")
         nr_of_days = amount_of_days_available
 
     if days:
-        print(f"List of days is provided: {days}. Optimizing only for these days. nr_of_days is ignored.")
+        if VERBOSE:
+            print(f"List of days is provided: {days}. Optimizing only for these days. nr_of_days is ignored.")
         input_dates = pd.to_datetime(days)
         input_dates = pd.to_datetime(input_dates).date
 
@@ -244,24 +1129,36 @@ def OptimizeRange(df_production_orders, nr_of_days, days):
     groups = df_production_orders.groupby("ProductieTijd")
     groups_list = [g[1] for g in list(groups)]
 
+    if day_workers > 1 or queue_path is not None:
+        day_results = functions_runner.run_days(groups_list[:nr_of_days], OptimizeDay, workers=day_workers,
+                                                queue_path=queue_path, output_dir=output_dir)
+        for date, df_results in day_results.items():
+            if VERBOSE:
+                print(f"Optimization complete - Results on {date}:")
+                print(df_results)
+            visualize_results(df_results, date, show=show)
+        return
+
     for data_day in groups_list[:nr_of_days]:
         unique_bases = len(data_day['Lengte'].unique())
         date = data_day.iloc[0]['ProductieTijd']
 
         if unique_bases > 1:
-            print(f"Performing GA iteration on: {date}")
-            print('More than one base length found, skipping day')
+            if VERBOSE:
+                print(f"Performing GA iteration on: {date}")
+                print('More than one base length found, skipping day')
             continue
 
         else:
             df_results = OptimizeDay(data_day, date)
             # Print the results
-            print("Optimization complete - Results:")
-            print(df_results)
-            visualize_results(df_results, date)
+            if VERBOSE:
+                print("Optimization complete - Results:")
+                print(df_results)
+            visualize_results(df_results, date, show=show)
 
 
-def visualize_results(df_results, date):
+def visualize_results(df_results, date, show=True):
     # Calculate the total values for each column
     totals = df_results.drop('Subset', axis=1).sum()
 
@@ -296,7 +1193,11 @@ def visualize_results(df_results, date):
     filename = f"{date}.png"
     plt.savefig(filename)
 
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
 
 
-OptimizeRange(df_production_orders=df_production_orders_small, nr_of_days=0, days=['2023-02-02'])
+if __name__ == "__main__":
+    OptimizeRange(df_production_orders=data.load_orders(), nr_of_days=0, days=['2023-02-02'])
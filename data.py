@@ -1,12 +1,136 @@
+import logging
+import os
 import pandas as pd
 import functions_dataprep
 
-# Read the production data from alpha deuren
+# Feather is the fastest cache format, pickle is used when pyarrow is not installed
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+# The production data from alpha deuren, read on first use by `load_orders`
 # df_orders = pd.read_excel('AlphaProductionData.xlsx')
 # df_production_orders = pd.read_excel('tProductieISO.xlsx')
-df_production_orders_small = pd.read_excel('tProductieISO_Small.xlsx')
+PRODUCTION_ORDERS_SMALL = 'tProductieISO_Small.xlsx'
 # materials = df_orders['MateriaalPaneelTxt'].unique()
 
+# The directory of the converted workbooks, None disables the cache
+CACHE_DIR = '.data_cache'
+
+# The workbooks that are loaded in this process, by path, with the modification time and size they were loaded at
+loaded_orders = {}
+
+logger = logging.getLogger(__name__)
+
+
+def cache_file(source, cache_dir=CACHE_DIR) -> str:
+    """
+    This function returns the cache file of a workbook. The modification time and size of the workbook are part of
+    the name, so a changed workbook is converted again.
+
+    Parameters:
+    source (str): The path of the workbook.
+    cache_dir (str): The directory of the converted workbooks.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    status = os.stat(source)
+    name = os.path.splitext(os.path.basename(source))[0]
+
+    return os.path.join(cache_dir, f"{name}-{status.st_mtime_ns}-{status.st_size}.{CACHE_FORMAT}")
+
+
+def read_cache(path) -> pd.DataFrame:
+    """
+    This function reads a converted workbook from its cache file.
+
+    Parameters:
+    path (str): The path of the cache file.
+
+    Returns:
+        DataFrame: The converted workbook.
+    """
+    if CACHE_FORMAT == 'feather':
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+
+def write_cache(df, path):
+    """
+    This function writes a converted workbook to its cache file, and removes the cache files of older versions of the
+    workbook. The file is written under a temporary name first, so other processes never read a partial file.
+
+    Parameters:
+    df (DataFrame): The converted workbook.
+    path (str): The path of the cache file.
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        if CACHE_FORMAT == 'feather':
+            df.to_feather(temporary)
+        else:
+            df.to_pickle(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        # Never leave a partial temporary file behind
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+    name = os.path.basename(path).rsplit('-', 2)[0]
+    for file in os.listdir(directory):
+        if file.rsplit('-', 2)[0] == name and file != os.path.basename(path) and not file.endswith('.tmp'):
+            os.remove(os.path.join(directory, file))
+
+
+def load_orders(source=PRODUCTION_ORDERS_SMALL, cache_dir=CACHE_DIR) -> pd.DataFrame:
+    """
+    This function loads the production orders of a workbook. The workbook is read once per process, and converted
+    once to a cache file that is read instead of the workbook, until the workbook changes. The loaded orders are
+    shared within the process, like a module level dataframe. A cache file that cannot be written, for example in a
+    read-only directory or for a dataframe that feather cannot store, is logged and the workbook is used as read.
+
+    Parameters:
+    source (str): The path of the workbook.
+    cache_dir (str): The directory of the converted workbooks, None to always read the workbook.
+
+    Returns:
+        DataFrame: The production orders.
+    """
+    status = os.stat(source)
+    key = os.path.abspath(source)
+    version = (status.st_mtime_ns, status.st_size)
+
+    if key in loaded_orders and loaded_orders[key][0] == version:
+        return loaded_orders[key][1]
+
+    if cache_dir is None:
+        df = pd.read_excel(source)
+    else:
+        path = cache_file(source, cache_dir)
+        if os.path.exists(path):
+            df = read_cache(path)
+        else:
+            df = pd.read_excel(source)
+            try:
+                write_cache(df, path)
+            except Exception as error:
+                logger.warning("Could not write the cache file %s: %r", path, error)
+
+    loaded_orders[key] = (version, df)
+
+    return df
+
+
 # This is not really safe, base length might be different for each material
 base_length = 12450  # functions_dataprep.extract_base_length(df_production_orders_small)
 
@@ -36,4 +160,12 @@ df_UbiOps = df_UbiOps.rename(columns={
     "widths": "Dikte",
     "heights": "Hoogte",
     "materialtypes": "MateriaalPaneelTxt"
-})
\ No newline at end of file
+})
+
+
+def __getattr__(name):
+    # The small production data set is loaded on first access, not when the module is imported
+    if name == 'df_production_orders_small':
+        return load_orders(PRODUCTION_ORDERS_SMALL)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
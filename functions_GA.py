@@ -1,13 +1,131 @@
 from typing import List, Dict, Tuple, Any
+import collections
+import functools
+import heapq
+import logging
 import random
 from data import base_length
 import time
 import math
+import numpy as np
+from deap import base
+from deap import creator
+import functions_cache
+import functions_metrics
+import functions_patterns
 
 
 # Main functions for the Genetic Algorithm
 # Used in the GA_CSP file
 
+# Integer type of the array representation of an individual
+PATTERN_DTYPE = np.int32
+
+# Number of subsets whose column layout is kept by `subsetLayout`
+LAYOUT_CACHE_SIZE = 1024
+
+# The max times of the sorted first individual, which does not limit the number of pieces of a length
+UNCAPPED_TIMES = 9999999
+
+# The maximum number of improving moves of one local search mutation
+LOCAL_SEARCH_MOVES = 50
+
+# The number of base panels with the most waste whose pieces are cut again by the repack move
+REPACK_PANELS = 6
+
+# The validation of created individuals: "off", "sampled" (every VALIDATION_INTERVAL-th individual) or "full"
+VALIDATION_LEVEL = "sampled"
+VALIDATION_INTERVAL = 20
+
+# Print the run time of the functions that are decorated with `measure_time`
+VERBOSE = True
+
+# Counts of the validations and invalid results, the details are logged instead of printed
+diagnostics = collections.Counter()
+logger = logging.getLogger(__name__)
+
+
+def setup_creator():
+    """
+    This function creates the "FitnessMin" and "Individual" classes in the DEAP creator module, if they do not exist
+    yet. It is called by the GA_CSP module and by every worker process, which need the classes to unpickle individuals.
+
+    Returns:
+        None
+    """
+    # Create the "FitnessMin" fitness class using the base Fitness class
+    # Weights are set to -1.0 because we want to minimize the fitness function
+    if not hasattr(creator, "FitnessMin"):
+        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+
+    # Create the "Individual" class, which inherits from list and has a fitness attribute
+    # The fitness attribute is of type "FitnessMin"
+    if not hasattr(creator, "Individual"):
+        creator.create("Individual", list, fitness=creator.FitnessMin)
+
+
+def individual_to_array(patterns: List[List[int]]) -> np.ndarray:
+    """
+    This function converts a list of patterns into the array representation of an individual. The result is an integer
+    matrix with one row per pattern, where the first column is the multiplicity of the pattern and the remaining columns
+    are the counts of each order length.
+
+    Parameters:
+    patterns (list): A list of patterns. Each pattern is a list with the frequency as the first element.
+
+    Returns:
+        np.ndarray: The pattern matrix of the individual.
+    """
+    if len(patterns) == 0:
+        return np.zeros((0, 0), dtype=PATTERN_DTYPE)
+
+    return np.array(patterns, dtype=PATTERN_DTYPE)
+
+
+def array_to_individual(matrix: np.ndarray) -> List[List[int]]:
+    """
+    This function converts the array representation of an individual back into a list of patterns.
+
+    Parameters:
+    matrix (np.ndarray): The pattern matrix of the individual.
+
+    Returns:
+        list: A list of patterns. Each pattern is a list with the frequency as the first element.
+    """
+    return matrix.tolist()
+
+
+def lengths_array(order_length_quantities) -> np.ndarray:
+    """
+    This function returns the order lengths of a subset as an integer array, in the column order of the patterns.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+
+    Returns:
+        np.ndarray: The order lengths.
+    """
+    return np.fromiter(order_length_quantities.keys(), dtype=np.int64, count=len(order_length_quantities))
+
+
+def equalIndividuals(ind1, ind2) -> bool:
+    """
+    This function compares two individuals, for both the list and the array representation. It is used as the
+    similarity function of the hall of fame, because the default equality is ambiguous for arrays.
+
+    Parameters:
+    ind1 (Individual): The first individual.
+    ind2 (Individual): The second individual.
+
+    Returns:
+        bool: True if both individuals contain the same patterns in the same order, False otherwise.
+    """
+    if isinstance(ind1[0], np.ndarray) or isinstance(ind2[0], np.ndarray):
+        return np.array_equal(ind1[0], ind2[0])
+
+    return ind1 == ind2
+
+
 def sanityCheck(order_length_quantities, population: list[List[List[int]]]) -> str:
     """
     This function checks the sanity of the given population. It checks if the sum of the patterns in each individual
@@ -24,9 +142,13 @@ def sanityCheck(order_length_quantities, population: list[List[List[int]]]) -> s
     total = 0
 
     for individual in population:
-        for pattern in individual:
-            x = pattern[1:]
-            total += sum(x) * pattern[0]
+        if isinstance(individual, np.ndarray):
+            matrix = individual.astype(np.int64)
+            total += int(matrix[:, 0] @ matrix[:, 1:].sum(axis=1))
+        else:
+            for pattern in individual:
+                x = pattern[1:]
+                total += sum(x) * pattern[0]
 
         sum_demand = sum(order_length_quantities.values())
 
@@ -41,6 +163,94 @@ def sanityCheck(order_length_quantities, population: list[List[List[int]]]) -> s
     return sanity
 
 
+def demandCheck(order_length_quantities, patterns) -> bool:
+    """
+    This function checks that the patterns of an individual cut exactly the demand of every order length, and that
+    every pattern that is cut fits in a base panel. Unlike `sanityCheck`, which compares the total number of pieces,
+    it verifies the demand per length, with one matrix product.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    patterns (list): The patterns of the individual, as a list of patterns or as a pattern matrix.
+
+    Returns:
+        bool: True if the patterns cut exactly the demand, False otherwise.
+    """
+    demand = np.fromiter(order_length_quantities.values(), dtype=np.int64, count=len(order_length_quantities))
+    matrix = np.asarray(patterns, dtype=np.int64).reshape(len(patterns), len(demand) + 1)
+
+    frequencies, counts = matrix[:, 0], matrix[:, 1:]
+    if (frequencies < 0).any() or (counts < 0).any():
+        return False
+
+    used_length = counts[frequencies > 0] @ lengths_array(order_length_quantities)
+    if (used_length > base_length).any():
+        return False
+
+    return bool(np.array_equal(frequencies @ counts, demand))
+
+
+def validateIndividual(order_length_quantities, patterns, validity_cache=None, level=None) -> bool:
+    """
+    This function validates a created individual according to the validation level. With "full" every individual is
+    checked with `demandCheck`, with "sampled" every VALIDATION_INTERVAL-th individual, and with "off" none. An invalid
+    individual is counted in the diagnostics and logged.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    patterns (list): The patterns of the individual, as a list of patterns or as a pattern matrix.
+    validity_cache (FitnessCache): The cache of validation results of the subset, optional.
+    level (str): The validation level, by default VALIDATION_LEVEL.
+
+    Returns:
+        bool: False if the individual was checked and is invalid, True otherwise.
+    """
+    level = VALIDATION_LEVEL if level is None else level
+    diagnostics['individuals'] += 1
+
+    if level == "off":
+        return True
+    if level == "sampled" and diagnostics['individuals'] % VALIDATION_INTERVAL:
+        return True
+
+    diagnostics['validations'] += 1
+    with functions_metrics.stage("validation"):
+        valid = sanityCheckCached(order_length_quantities, patterns, validity_cache)
+
+    if not valid:
+        diagnostics['invalid_individuals'] += 1
+        logger.warning("Invalid individual created: %s", patterns)
+
+    return valid
+
+
+def applyPattern(demand, pattern) -> int:
+    """
+    This function applies a pattern to the demand as often as possible. The number of times is calculated directly as
+    the minimum of demand // pattern over the lengths in the pattern, and the demand is updated in place.
+
+    Parameters:
+    demand (list): The demand for each order length, as a list or an array.
+    pattern (list): The piece counts of the pattern, without its frequency.
+
+    Returns:
+        int: The number of times the pattern was applied.
+    """
+    if isinstance(demand, np.ndarray):
+        pattern = np.asarray(pattern)
+        used = pattern > 0
+        times = int(np.min(demand[used] // pattern[used])) if used.any() else 0
+        demand -= times * pattern
+        return times
+
+    times = min((x // y for x, y in zip(demand, pattern) if y > 0), default=0)
+    if times > 0:
+        for i, y in enumerate(pattern):
+            demand[i] -= times * y
+
+    return times
+
+
 def subtract_lists(list1: List[int], list2: List[int]) -> List[int]:
     """
     This function subtracts the elements of arr2 from arr1, until the result is non negative. It returns a new list with
@@ -54,22 +264,16 @@ def subtract_lists(list1: List[int], list2: List[int]) -> List[int]:
         list: A new list with the number of times list2 was subtracted from arr1 as the first element,
         followed by the resulting list.
     """
-    # Initialize the count of how many times list2 has been subtracted from list1
-    pattern_count = 1  # already subtracted once from demand
-
     # Make sure the lists have the same length
     if len(list1) != len(list2):
         # print("Unequal lists")
         return None
 
-    # Subtract list2 from list1 until the result is non-negative
-    while all(x - y >= 0 for x, y in zip(list1, list2)):
-        list1 = [x - y for x, y in zip(list1, list2)]
-        # print(f"{'list1 (demand) in loop'}: {list1}")
-        pattern_count += 1
+    # Subtract list2 from list1 as often as the result stays non-negative, it was already subtracted once from demand
+    result = list(list1)
+    pattern_count = 1 + applyPattern(result, list2)
 
-    # Create the result list and insert the pattern count as the first element
-    result = list1
+    # Insert the pattern count as the first element
     result.insert(0, pattern_count)
 
     # print(f"{'list1 (demand) result'}: {list1}")
@@ -77,6 +281,25 @@ def subtract_lists(list1: List[int], list2: List[int]) -> List[int]:
     return result
 
 
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def subsetLayout(lengths: Tuple[int, ...]) -> Tuple[Dict[int, int], Tuple[int, ...]]:
+    """
+    This function computes the column layout of a subset once: the column of every order length in the patterns, and
+    the columns sorted by descending length. The sort methods and the pattern calculations reorder the demand and the
+    patterns with these index arrays instead of building dictionaries for every pattern.
+
+    Parameters:
+    lengths (tuple): The order lengths of the subset, in the column order of the patterns.
+
+    Returns:
+        tuple: A dictionary with the column of every length, and a tuple of the columns sorted by descending length.
+    """
+    column_of = {length: column for column, length in enumerate(lengths)}
+    descending = tuple(sorted(range(len(lengths)), key=lambda column: lengths[column], reverse=True))
+
+    return column_of, descending
+
+
 def demand_length(sorted_objects: Dict[int, int]) -> Tuple[List[int], List[int]]:
     """
     This function calculates the demand for each type of object and sorts the objects in descending order by length.
@@ -109,11 +332,14 @@ def sort_rer_one(order_length_quantities: Dict[str, int]) -> Tuple[List[int], Li
     Returns:
         tuple: A tuple with two lists: one with the keys (demand) and one with the values (length).
     """
-    # Sort the dictionary in descending order
-    sorted_objects = dict(sorted(order_length_quantities.items(), reverse=True))
+    # Sort the columns in descending order of length
+    lengths = tuple(order_length_quantities.keys())
+    quantities = list(order_length_quantities.values())
+    _, order = subsetLayout(lengths)
 
-    # Get the demand and length lists from the sorted objects
-    demand, length = demand_length(sorted_objects)
+    # Get the demand and length lists in the sorted order
+    demand = [quantities[column] for column in order]
+    length = [lengths[column] for column in order]
 
     return demand, length
 
@@ -128,16 +354,15 @@ def sort_rer_two(order_length_quantities: Dict[int, int]) -> Tuple[List[int], Li
     Returns:
         tuple: A tuple containing the demand and length lists.
     """
-    # Shuffle the objects randomly
-    l = list(order_length_quantities.items())
-    random.shuffle(l)
-    shuffled_objects = dict(l)
+    # Shuffle the columns randomly, which draws the same permutation as shuffling the objects themselves
+    lengths = list(order_length_quantities.keys())
+    quantities = list(order_length_quantities.values())
+    order = list(range(len(lengths)))
+    random.shuffle(order)
 
-    # Calculate the demand for each type of object
-    demand = list(shuffled_objects.values())
-
-    # Sort the objects in descending order by length
-    length = list(shuffled_objects.keys())
+    # Get the demand and length lists in the shuffled order
+    demand = [quantities[column] for column in order]
+    length = [lengths[column] for column in order]
 
     return demand, length
 
@@ -176,8 +401,9 @@ def calc_total_length(lengths: List[int], pattern: List[int]) -> int:
             continue
         total_length += lengths[i - 1] * val
 
-        if total_length > base_length or total_length < 0:
-            print("Pattern invalid: ", total_length)
+    if total_length > base_length:
+        diagnostics['invalid_patterns'] += 1
+        logger.debug("Pattern invalid: %s", total_length)
 
     return total_length
 
@@ -231,7 +457,7 @@ def create_pattern(order_length_quantities: Dict, rer_one: bool) -> Tuple[List[i
     # Create an empty population
     pattern = create_list_of_zeros(len(order_length_quantities) + 1)
 
-    max_times = 9999999  # temp solution
+    max_times = UNCAPPED_TIMES
 
     # For rer two, we set the max number of times an object can appear in the pattern based on a random percentage
     if not rer_one:
@@ -255,28 +481,26 @@ def create_pattern(order_length_quantities: Dict, rer_one: bool) -> Tuple[List[i
             if max_times <= 0:
                 max_times = 1
 
+    # Keep track of the used length of the pattern while it is constructed
+    used_length = 0
+
     # Construct the cutting pattern
     for j in range(len(length)):
 
-        # Check if the current object fits in the pattern
-        times_cut = 0
-        while (calc_total_length(length, pattern) + length[j] <= base_length) and sum(
-                demand) > 0 and max_times > times_cut:
+        # Add as many copies of the current object as fit in the remaining length and are still demanded. Every copy
+        # also decrements the max times, so at most half (rounded up) of the remaining max times can be used.
+        times_cut = int(min((base_length - used_length) // length[j], demand[j], max(0, (max_times + 1) // 2)))
 
-            # Check if there is still demand for the current object
-            if demand[j] > 0:
-                demand[j] -= 1
-            else:
-                break
-
-            # Add the object to the pattern
-            times_cut += 1
+        if times_cut <= 0:
+            continue
 
-            # Increment the count of how many times the current object has been cut
-            pattern[(j + 1)] = times_cut
+        # Add the objects to the pattern and decrement the demand
+        pattern[(j + 1)] = times_cut
+        demand[j] -= times_cut
+        used_length += times_cut * length[j]
 
-            # Decrement the max times the object can be cut
-            max_times -= 1
+        # Decrement the max times the object can be cut
+        max_times -= times_cut
 
     return pattern, length, demand
 
@@ -287,7 +511,7 @@ List[int]]:
     """
     This function applies a given pattern to the demand for objects of different lengths, as often as possible given
     the demand. It also has the option to restore the pattern to its original sort order. Finally, it sets the first
-    element of the pattern to the remaining demand for the first object.
+    element of the pattern to the number of times the pattern is cut.
 
     Parameters:
     pattern (list): The list representing the pattern to be applied.
@@ -298,40 +522,35 @@ List[int]]:
     Returns:
         tuple: A tuple containing the updated pattern, length, and demand lists.
     """
-    # Apply pattern as often as possible given the demand
+    # Apply pattern as often as possible given the demand, it was already applied once when it was created
     length_requirements = pattern[1:]
-    demand = subtract_lists(demand, length_requirements)
+    times = 1 + applyPattern(demand, length_requirements)
 
     # Restore pattern, length to original sort order
     if restore:
 
-        pattern_dict = dict(zip(length, length_requirements))
-        pattern_dict_sorted = dict(map(lambda k: (k, pattern_dict[k]), order_length_quantities.keys()))
+        lengths = tuple(order_length_quantities.keys())
+        column_of, _ = subsetLayout(lengths)
 
-        pattern = list(pattern_dict_sorted.values())
+        # Move every count and demand to the column of its length, with the cutting times at the beginning
+        pattern = [times] + [0] * len(lengths)
+        restored_demand = [0] * len(lengths)
+        for position, current_length in enumerate(length):
+            column = column_of[current_length]
+            pattern[column + 1] = length_requirements[position]
+            restored_demand[column] = demand[position]
 
-        # Insert a zero at the beginning of the pattern
-        pattern.insert(0, 0)
+        demand = restored_demand
+        length = list(lengths)
 
-        # Set the first element of the pattern to the remaining demand for the first object
-        pattern[0] = demand[0]
-        demand.pop(0)
-
-        demand_dict = dict(zip(length, demand))
-        demand_dict_sorted = dict(map(lambda k: (k, demand_dict[k]), order_length_quantities.keys()))
-
-        demand = list(demand_dict_sorted.values())
-        length = list(demand_dict_sorted.keys())
-
-        pattern_length = calc_total_length(length, pattern)
-        if pattern_length > base_length:
-            print("Pattern invalid at calculation: ", pattern)
+        # An invalid pattern is counted in the diagnostics by `calc_total_length`
+        if VALIDATION_LEVEL == "full":
+            calc_total_length(length, pattern)
 
         return pattern, length, demand
 
-    # Set the first element of the pattern to the remaining demand for the first object
-    pattern[0] = demand[0]
-    demand.pop(0)
+    # Set the first element of the pattern to the cutting times
+    pattern[0] = times
 
     return pattern, length, demand
 
@@ -340,13 +559,40 @@ List[int]]:
 rer_one = True
 
 
-def create_individual(order_length_quantities):
+def indexPattern(pattern_index, demand: np.ndarray, sample: bool):
+    """
+    This function takes a pattern for the residual demand from the pattern index or the pattern generator and applies
+    it as often as possible given the demand. The demand is updated in place.
+
+    Parameters:
+    pattern_index (PatternIndex): The pattern index or the pattern generator of the subset.
+    demand (np.ndarray): The residual demand for each order length, in the order of the subset.
+    sample (bool): Whether to take a random low waste pattern instead of the pattern with the least waste.
+
+    Returns:
+        list: The pattern with its frequency as the first element, or None if no piece of the demand fits.
     """
-    Create a cutting pattern for a given set of objects and base length.
+    counts = pattern_index.sample(demand) if sample else pattern_index.best(demand)
+    if counts is None:
+        return None
+
+    # Apply the pattern as often as the demand of each of its lengths allows
+    times = applyPattern(demand, counts)
+
+    return [times] + counts.tolist()
+
+
+def create_individual(order_length_quantities, pattern_index=None, pattern_generator=None):
+    """
+    Create a cutting pattern for a given set of objects and base length. With a pattern index, the patterns are taken
+    from the index instead of being constructed. With a pattern generator, the first individual takes the knapsack
+    pattern with the least waste each time.
 
     Parameters:
     objects (dict): Dictionary containing the objects to be cut with their corresponding length and demand.
     base_length (int): The length of the base material.
+    pattern_index (PatternIndex): The pattern index of the subset, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
 
     Returns:
     individual (list): List of cutting patterns.
@@ -364,6 +610,21 @@ def create_individual(order_length_quantities):
     # Initialize the flag to use the first sorting method
     global rer_one
 
+    # Take the patterns from the pattern index, the first individual takes the pattern with the least waste each time
+    if pattern_index is not None or (rer_one and pattern_generator is not None):
+        source = pattern_index if pattern_index is not None else pattern_generator
+        demand = np.array(demand, dtype=np.int64)
+
+        while demand.sum() > 0:
+            pattern = indexPattern(source, demand, sample=not rer_one)
+            if pattern is None:
+                break
+            individual.append(pattern)
+
+        # An incomplete index may not fit the residual demand, it is cut with constructed patterns like the repair
+        demand = demand.tolist()
+        objects2 = dict(zip(order_length_quantities.keys(), demand))
+
     # Loop until all objects have been cut
     while sum(demand) > 0:
         # Create pattern and return the length and demand in it's used sort order
@@ -386,15 +647,30 @@ def create_individual(order_length_quantities):
     # Flatten the individual into one list
     # individual = [val for sublist in individual for val in sublist]
 
-    # Sanity check
-    sanity = sanityCheck(order_length_quantities=order_length_quantities, population=[individual])
-    if not sanity:
-        print('False offspring created')
+    # Validate the individual according to the validation level
+    validateIndividual(order_length_quantities, individual)
 
     # Return the individual
     return individual
 
 
+def create_individual_array(order_length_quantities, pattern_index=None, pattern_generator=None) -> np.ndarray:
+    """
+    This function creates an individual in the array representation, by creating the patterns with `create_individual`
+    and converting them into a pattern matrix.
+
+    Parameters:
+    order_length_quantities (dict): Dictionary containing the order lengths and their demand.
+    pattern_index (PatternIndex): The pattern index of the subset, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+
+    Returns:
+        np.ndarray: The pattern matrix of the individual.
+    """
+    return individual_to_array(create_individual(order_length_quantities=order_length_quantities,
+                                                 pattern_index=pattern_index, pattern_generator=pattern_generator))
+
+
 def create_initial_population(order_length_quantities: List[Any], POPULATION_SIZE: int) -> List[List[Any]]:
     """
     This function generates a list of randomly generated individuals, with a given base length and number of objects.
@@ -415,6 +691,122 @@ def create_initial_population(order_length_quantities: List[Any], POPULATION_SIZ
     return population
 
 
+def create_population_batch(order_length_quantities, n: int, pattern_generator=None) -> List[List[List[int]]]:
+    """
+    This function creates the patterns of n individuals at once. Every round creates one pattern for every individual
+    with residual demand, like `create_pattern` and `patternCalculations`: the lengths are visited in a random order
+    and cut as often as they fit, are demanded and are allowed by the random max times of the first length, after
+    which the pattern is applied as often as the demand allows. The orders, the max times and the fill are arrays over
+    all individuals. While rer_one is set, the first individual visits the lengths in descending order without max
+    times, or takes the knapsack patterns of the pattern generator if one is given, after which rer_one is cleared like
+    in `create_individual`. The random generator is seeded from `random`, so the population is reproducible. The
+    individuals are validated according to the validation level.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    n (int): The number of individuals.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+
+    Returns:
+        list: The patterns of every individual.
+    """
+    lengths = lengths_array(order_length_quantities)
+    quantities = np.fromiter(order_length_quantities.values(), dtype=np.int64, count=len(order_length_quantities))
+    _, descending = subsetLayout(tuple(order_length_quantities.keys()))
+
+    global rer_one
+    first_sorted = rer_one and n > 0
+
+    rng = np.random.default_rng(random.getrandbits(64))
+    demand = np.tile(quantities, (n, 1))
+    individuals = [[] for _ in range(n)]
+
+    # The first individual takes the pattern with the least waste each time
+    if pattern_generator is not None and first_sorted:
+        while demand[0].sum() > 0:
+            pattern = indexPattern(pattern_generator, demand[0], sample=False)
+            if pattern is None:
+                break
+            individuals[0].append(pattern)
+
+    while True:
+        active = np.flatnonzero(demand.sum(axis=1) > 0)
+        if len(active) == 0:
+            break
+
+        rows = np.arange(len(active))
+        residual = demand[active]
+        is_sorted = (active == 0) & first_sorted
+
+        # Visit the lengths in a random order, or in descending order for the first individual
+        order = np.argsort(rng.random(residual.shape), axis=1)
+        order[is_sorted] = descending
+
+        # Limit the number of pieces by a random percentage of the panel, unless the first length fits well
+        first_length = lengths[order[:, 0]]
+        max_count = base_length // first_length
+        random_percentage = rng.integers(10, 101, size=len(active)) / 100
+        random_times = np.maximum(np.round((base_length - random_percentage * base_length) / first_length), 1)
+
+        max_times = np.where(base_length - max_count * first_length < 0.025 * base_length, max_count,
+                             random_times).astype(np.int64)
+        max_times[is_sorted] = UNCAPPED_TIMES
+
+        # Fill the patterns position by position, see `create_pattern`
+        pattern = np.zeros_like(residual)
+        used_length = np.zeros(len(active), dtype=np.int64)
+
+        for j in range(residual.shape[1]):
+            column = order[:, j]
+            times_cut = np.minimum(np.minimum((base_length - used_length) // lengths[column], residual[rows, column]),
+                                   np.maximum(0, (max_times + 1) // 2))
+
+            pattern[rows, column] = times_cut
+            residual[rows, column] -= times_cut
+            used_length += times_cut * lengths[column]
+            max_times -= times_cut
+
+        # Apply every pattern as often as possible, it was already applied once
+        ratios = np.where(pattern > 0, residual // np.maximum(pattern, 1), np.iinfo(np.int64).max)
+        extra = ratios.min(axis=1)
+        residual -= extra[:, None] * pattern
+        demand[active] = residual
+
+        for i, times, counts in zip(active.tolist(), (extra + 1).tolist(), pattern.tolist()):
+            individuals[i].append([times] + counts)
+
+    # Only the first population of a subset starts with the sorted individual
+    if first_sorted:
+        rer_one = False
+
+    # Validate the individuals according to the validation level
+    for patterns in individuals:
+        validateIndividual(order_length_quantities, patterns)
+
+    return individuals
+
+
+def create_population(n: int, order_length_quantities, pattern_generator=None, as_array=False) -> list:
+    """
+    This function creates a population of n individuals with `create_population_batch`.
+
+    Parameters:
+    n (int): The number of individuals.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+    as_array (bool): Whether to create the individuals in the array representation.
+
+    Returns:
+        list: The population.
+    """
+    individuals = create_population_batch(order_length_quantities, n, pattern_generator=pattern_generator)
+
+    if as_array:
+        return [creator.Individual([individual_to_array(patterns)]) for patterns in individuals]
+
+    return [creator.Individual([patterns]) for patterns in individuals]
+
+
 def patternWaste(pattern, lengths):
     """
     This function calculates the waste for a given pattern.
@@ -456,6 +848,42 @@ def findMinimalWastePattern(individual, lengths):
     return individual[min_waste_index]
 
 
+def parentWaste(patterns, order_length_quantities) -> List[int]:
+    """
+    This function calculates the waste of every pattern of a parent at once, so the crossover does not recalculate it
+    for every gene it takes.
+
+    Parameters:
+    patterns (list): The patterns of the parent, as a list of patterns or as a pattern matrix.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+
+    Returns:
+        list: The waste of each pattern.
+    """
+    if len(patterns) == 0:
+        return []
+
+    matrix = np.asarray(patterns, dtype=np.int64)
+    return (base_length - matrix[:, 1:] @ lengths_array(order_length_quantities)).tolist()
+
+
+def geneHeap(patterns, waste):
+    """
+    This function creates a min-heap of the genes of a parent, ordered by their waste and then by their position, so
+    popping the heap returns the same gene as `findMinimalWastePattern` on the remaining patterns.
+
+    Parameters:
+    patterns (list): The patterns of the parent.
+    waste (list): The waste of each pattern.
+
+    Returns:
+        list: The heap of (waste, position, pattern) entries.
+    """
+    heap = list(zip(waste, range(len(patterns)), patterns))
+    heapq.heapify(heap)
+    return heap
+
+
 def individualWaste(individual, order_length_quantities):
     """
     This function calculates the total waste for a given list of patterns. The waste is calculated
@@ -468,6 +896,9 @@ def individualWaste(individual, order_length_quantities):
     Returns:
         tuple: A tuple containing the total waste as the only element.
     """
+    if isinstance(individual[0], np.ndarray):
+        return sum_baseLength(individual[0]) * 12450,  # return a tuple
+
     lengths = list(order_length_quantities.keys())
     # zipped_individual = zip_individual(individual)
     waste_total = 0
@@ -480,6 +911,101 @@ def individualWaste(individual, order_length_quantities):
 
     return material_used,  # return a tuple
 
+def populationWaste(population, order_length_quantities) -> np.ndarray:
+    """
+    This function calculates the fitness (material used) of a batch of individuals at once. The multiplicities of all
+    patterns in the batch are stacked into one array and summed per individual, instead of calling `individualWaste`
+    for every individual.
+
+    Parameters:
+    population (list): A list of individuals, in the list or the array representation.
+
+    Returns:
+        np.ndarray: The material used by each individual, in the order of the population.
+    """
+    if population and isinstance(population[0][0], np.ndarray):
+        multiplicities = np.concatenate([individual[0][:, 0] for individual in population]).astype(np.int64)
+    else:
+        multiplicities = np.fromiter((pattern[0] for individual in population for pattern in individual[0]),
+                                     dtype=np.int64)
+
+    # Sum the multiplicities per individual with the cumulative sum over the stacked patterns
+    nr_of_patterns = np.fromiter((len(individual[0]) for individual in population), dtype=np.int64,
+                                 count=len(population))
+    cumulative = np.concatenate(([0], np.cumsum(multiplicities)))
+    ends = np.cumsum(nr_of_patterns)
+    nr_of_bases = cumulative[ends] - cumulative[ends - nr_of_patterns]
+
+    return nr_of_bases * 12450
+
+
+def populationWasteCached(population, order_length_quantities, cache, evaluate=None) -> np.ndarray:
+    """
+    This function calculates the fitness of a batch of individuals like `populationWaste`, but looks up every
+    individual in the fitness cache by its canonical form first. Only the individuals that are not in the cache are
+    evaluated, and their fitness is added to the cache.
+
+    Parameters:
+    population (list): A list of individuals, in the list or the array representation.
+    cache (FitnessCache): The fitness cache of the subset.
+    evaluate (function): The function that evaluates the missing individuals, for example in a process pool, by
+    default `populationWaste`.
+
+    Returns:
+        np.ndarray: The material used by each individual, in the order of the population.
+    """
+    fitnesses = np.zeros(len(population), dtype=np.int64)
+
+    # Group the individuals that are not in the cache by key, so clones within the batch are evaluated once
+    missing = {}
+    for i, individual in enumerate(population):
+        key = functions_cache.canonical_form(individual[0])
+        fitness = cache.get(key) if key not in missing else None
+
+        if fitness is None:
+            missing.setdefault(key, []).append(i)
+        else:
+            fitnesses[i] = fitness
+
+    if missing:
+        individuals = [population[indices[0]] for indices in missing.values()]
+        if evaluate is None:
+            computed = populationWaste(individuals, order_length_quantities=order_length_quantities)
+        else:
+            computed = evaluate(individuals)
+        for (key, indices), fitness in zip(missing.items(), computed.tolist()):
+            fitnesses[indices] = fitness
+            cache.put(key, fitness)
+
+    return fitnesses
+
+
+def sanityCheckCached(order_length_quantities, patterns, cache) -> bool:
+    """
+    This function checks one individual with `demandCheck`, but looks up the individual in the validity cache by its
+    canonical form first.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    patterns (list): The patterns of the individual, as a list of patterns or as a pattern matrix.
+    cache (FitnessCache): The validity cache of the subset, or None to always perform the check.
+
+    Returns:
+        bool: True if the individual passes the sanity check, False otherwise.
+    """
+    if cache is None:
+        return demandCheck(order_length_quantities, patterns)
+
+    key = functions_cache.canonical_form(patterns)
+    sanity = cache.get(key)
+
+    if sanity is None:
+        sanity = demandCheck(order_length_quantities, patterns)
+        cache.put(key, sanity)
+
+    return sanity
+
+
 def CalcWaste(individual, order_length_quantities):
     """
     This function calculates the total waste for a given list of patterns. The waste is calculated
@@ -492,6 +1018,11 @@ def CalcWaste(individual, order_length_quantities):
     Returns:
         tuple: A tuple containing the total waste as the only element.
     """
+    if isinstance(individual[0], np.ndarray):
+        matrix = individual[0].astype(np.int64)
+        used_length = matrix[:, 1:] @ lengths_array(order_length_quantities)
+        return int(matrix[:, 0] @ (base_length - used_length))
+
     lengths = list(order_length_quantities.keys())
     # zipped_individual = zip_individual(individual)
     waste_total = 0
@@ -521,7 +1052,9 @@ def baseLengthsAmount(individual):
     return baseLengths_total,  # return a tuple
 
 
-def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_quantities) -> List[List[int]]:
+def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_quantities,
+                    validity_cache=None, pattern_index=None, pattern_generator=None, waste1=None,
+                    waste2=None) -> List[List[int]]:
     """
     This function creates offspring patterns by combining patterns from two individual patterns, using a random selection
     process. It also applies the selected patterns to the demand for objects of different lengths, as often as possible.
@@ -530,6 +1063,12 @@ def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_q
     Parameters:
     ind1 (list): The first individual pattern to be used in the offspring creation.
     ind2 (list): The second individual pattern to be used in the offspring creation.
+    validity_cache (FitnessCache): The cache of sanity check results of the subset, optional.
+    pattern_index (PatternIndex): The pattern index of the subset, used for the residual demand if given, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, used for the residual demand
+    instead of the pattern index if given, optional.
+    waste1 (list): The waste of each pattern of the first individual, calculated if not given.
+    waste2 (list): The waste of each pattern of the second individual, calculated if not given.
 
     Returns:
         list: A list of the offspring patterns created.
@@ -542,9 +1081,13 @@ def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_q
     # Store the original demand
     demand, length = demand_length(order_length_quantities)
 
-    # Create copies of the individual to work with
-    individual1 = ind1.copy()
-    individual2 = ind2.copy()
+    # Order the genes of each individual by their waste in a heap to work with
+    if waste1 is None:
+        waste1 = parentWaste(ind1, order_length_quantities)
+    if waste2 is None:
+        waste2 = parentWaste(ind2, order_length_quantities)
+    individual1 = geneHeap(ind1, waste1)
+    individual2 = geneHeap(ind2, waste2)
 
     # Start with parent to be individual 1
     parent = individual1
@@ -556,12 +1099,9 @@ def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_q
         # Take a random pattern
         if parent:
 
-            # Select a random gene (pattern) and remove it from the parent
+            # Take the gene (pattern) with the least waste from the parent
             # gene = random.choice(parent)
-            gene = findMinimalWastePattern(parent, length)
-            parent.remove(gene)
-
-            pattern_parent_waste = patternWaste(gene, length)
+            pattern_parent_waste, _, gene = heapq.heappop(parent)
 
             if pattern_parent_waste > (base_length * 0.10):
                 # print('Waste too high')
@@ -571,67 +1111,455 @@ def createOffspring(ind1: List[List[int]], ind2: List[List[int]], order_length_q
             # print(f"{'length'}: {length}")
             # print(f"{'demand'}: {demand}")
 
-            # Remove initial pattern from demand
-            demand_copy = demand.copy()
-            demand_copy = [x - y for x, y in zip(demand_copy, gene[1:])]
-            if all(n >= 0 for n in demand_copy):
-                demand = demand_copy.copy()
-            else:
+            # Apply the pattern to the demand as often as possible, switch parent if it does not fit once
+            times = applyPattern(demand, gene[1:])
+            if times == 0:
 
-                if parent == individual1 and individual2:
+                if parent is individual1 and individual2:
                     parent = individual2
-                elif parent == individual2 and individual1:
+                elif parent is individual2 and individual1:
                     parent = individual1
 
                 continue
 
-            # print(f"{'demand after initial removal of pattern'}: {demand}")
-
-            # Set the pattern cutting times, and return length and demand in original order
-            pattern, length, demand = patternCalculations(gene, length, demand, restore=False,
-                                                          order_length_quantities=order_length_quantities)
-
             # print(f"{'demand after recalculation'}: {demand}")
 
-            offspring.append(pattern)
+            # Set the pattern cutting times
+            gene[0] = times
+            offspring.append(gene)
             # print(f"{'pattern after recalculation'}: {pattern}")
 
-            if parent == individual1 and individual2:
+            if parent is individual1 and individual2:
                 parent = individual2
-            elif parent == individual2 and individual1:
+            elif parent is individual2 and individual1:
                 parent = individual1
 
         else:
 
             # print("running RER1")
 
-            # Set the length to create a dictionary with the residual demand
-            length = list(order_length_quantities.keys())
+            # Repair the offspring with new patterns for the residual demand
+            with functions_metrics.stage("repair"):
 
-            # Update the objects dictionary with the remaining demand
-            objects2 = dict(zip(length, demand))
+                # Set the length to create a dictionary with the residual demand
+                length = list(order_length_quantities.keys())
 
-            # Create pattern and return the length and demand in it's used sort order
-            pattern, length, demand = create_pattern(order_length_quantities=objects2, rer_one=True)
+                # Take the pattern with the least waste for the residual demand from the pattern generator or index
+                source = pattern_generator if pattern_generator is not None else pattern_index
+                if source is not None:
+                    residual = np.array(demand, dtype=np.int64)
+                    pattern = indexPattern(source, residual, sample=False)
 
-            # Set the pattern cutting times, and return length and demand in original order
-            pattern, length, demand = patternCalculations(pattern, length, demand, restore=True,
-                                                          order_length_quantities=order_length_quantities)
+                    if pattern is not None:
+                        demand = residual.tolist()
+                        offspring.append(pattern)
+                        continue
 
-            # Add the current pattern to the list of cutting patterns
-            offspring.append(pattern)
+                # Update the objects dictionary with the remaining demand
+                objects2 = dict(zip(length, demand))
 
-            # print(f"{'pattern'}: {pattern}")
+                # Create pattern and return the length and demand in it's used sort order
+                pattern, length, demand = create_pattern(order_length_quantities=objects2, rer_one=True)
 
-    # Sanity check
-    sanity = sanityCheck(order_length_quantities=order_length_quantities, population=[offspring])
+                # Set the pattern cutting times, and return length and demand in original order
+                pattern, length, demand = patternCalculations(pattern, length, demand, restore=True,
+                                                              order_length_quantities=order_length_quantities)
 
-    if not sanity:
-        print('False offspring created')
+                # Add the current pattern to the list of cutting patterns
+                offspring.append(pattern)
+
+                # print(f"{'pattern'}: {pattern}")
+
+    # Validate the offspring according to the validation level
+    validateIndividual(order_length_quantities, offspring, validity_cache=validity_cache)
 
     return offspring
 
 
+def crossoverFunction(ind1, ind2, order_length_quantities, validity_cache=None, pattern_index=None,
+                      pattern_generator=None):
+    """
+    This function creates offspring from two parent individuals by calling the `createOffspring` function and passing in
+    the patterns of the parent individuals as arguments. It then creates new `Individual` objects using the offspring
+    patterns and sets their fitness attributes.
+
+    Parameters:
+    ind1 (Individual): The first parent individual.
+    ind2 (Individual): The second parent individual.
+    validity_cache (FitnessCache): The cache of sanity check results of the subset, optional.
+    pattern_index (PatternIndex): The pattern index of the subset, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+
+    Returns:
+        tuple: A tuple containing the two offspring `Individual` objects.
+    """
+    offsprings = []
+
+    # Patterns in the array representation are converted to lists for the crossover, and back afterwards
+    as_array = isinstance(ind1[0], np.ndarray)
+    if as_array:
+        patterns1 = array_to_individual(ind1[0])
+        patterns2 = array_to_individual(ind2[0])
+    else:
+        patterns1 = ind1[0]
+        patterns2 = ind2[0]
+
+    # The waste of the patterns of both parents is calculated once for both offspring
+    waste1 = parentWaste(ind1[0], order_length_quantities)
+    waste2 = parentWaste(ind2[0], order_length_quantities)
+
+    while len(offsprings) < 2:
+        offspring = createOffspring(patterns1, patterns2, order_length_quantities=order_length_quantities,
+                                    validity_cache=validity_cache, pattern_index=pattern_index,
+                                    pattern_generator=pattern_generator, waste1=waste1, waste2=waste2)
+
+        if as_array:
+            offspring = individual_to_array(offspring)
+
+        # create a new Individual object and set its fitness attribute
+        offspring_individual = creator.Individual([offspring])
+
+        offsprings.append(offspring_individual)
+
+    return offsprings[0], offsprings[1]
+
+
+class TimeBudget:
+    """
+    This class is a time budget that is restarted every generation, so the local search mutation stops improving
+    individuals once the budget of the generation is spent.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.deadline = None
+
+    def restart(self, deadline=None):
+        """
+        This function starts the budget of a new generation, which ends no later than the given deadline.
+
+        Parameters:
+        deadline (float): The `time.perf_counter` value at which the budget ends at the latest, optional.
+
+        Returns:
+            None
+        """
+        self.deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+
+        if deadline is not None:
+            self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+
+    def exhausted(self) -> bool:
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+
+def splitCopy(patterns: List[List[int]], used: List[int], i: int, counts: List[int], used_length: int):
+    """
+    This function replaces one copy of pattern i by a new pattern with the given piece counts and used length.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+    i (int): The position of the pattern.
+    counts (list): The piece counts of the new pattern.
+    used_length (int): The used length of the new pattern.
+
+    Returns:
+        None
+    """
+    patterns[i][0] -= 1
+    patterns.append([1] + counts)
+    used.append(used_length)
+
+
+def mergeMove(patterns: List[List[int]], used: List[int]) -> bool:
+    """
+    This function merges one copy of each of the two patterns with the lowest used length into one pattern, if the
+    pieces of both fit in one base panel. The move saves one base panel, so its delta is known without an evaluation.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+
+    Returns:
+        bool: True if the patterns were merged.
+    """
+    copies = sorted((i for i in range(len(patterns)) if patterns[i][0] > 0), key=lambda i: used[i])
+    if not copies:
+        return False
+
+    # The two lowest copies are two copies of the same pattern, if it is cut more than once
+    first = copies[0]
+    second = first if patterns[first][0] > 1 else (copies[1] if len(copies) > 1 else None)
+    if second is None or used[first] + used[second] > base_length:
+        return False
+
+    counts = [x + y for x, y in zip(patterns[first][1:], patterns[second][1:])]
+    patterns[second][0] -= 1
+    splitCopy(patterns, used, first, counts, used[first] + used[second])
+
+    return True
+
+
+def emptyMove(patterns: List[List[int]], used: List[int], lengths: List[int]) -> bool:
+    """
+    This function moves the pieces of one copy of a pattern with a high waste into copies of other patterns with spare
+    room, best fit and longest piece first, so the emptied base panel is dropped. The patterns are tried from the
+    highest waste down, and the first pattern whose pieces all fit is emptied. Each placement is checked against the
+    spare room of its target copy, so the move costs no evaluation.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+    lengths (list): The order lengths, in the column order of the patterns.
+
+    Returns:
+        bool: True if a pattern was emptied.
+    """
+    copies = sorted((i for i in range(len(patterns)) if patterns[i][0] > 0), key=lambda i: used[i])
+    columns = sorted(range(len(lengths)), key=lambda j: lengths[j], reverse=True)
+
+    for source in copies:
+        # The targets are one copy of every other pattern, including another copy of the source itself
+        spare = {i: base_length - used[i] for i in copies if i != source or patterns[i][0] > 1}
+        added = {}
+
+        placed = True
+        for j in columns:
+            for _ in range(patterns[source][j + 1]):
+                fits = [i for i in spare if spare[i] >= lengths[j]]
+                if not fits:
+                    placed = False
+                    break
+
+                target = min(fits, key=lambda i: spare[i])
+                spare[target] -= lengths[j]
+                added.setdefault(target, [0] * len(lengths))[j] += 1
+
+            if not placed:
+                break
+
+        if not placed:
+            continue
+
+        patterns[source][0] -= 1
+        for target, extra in added.items():
+            counts = [x + y for x, y in zip(patterns[target][1:], extra)]
+            splitCopy(patterns, used, target, counts, base_length - spare[target])
+
+        return True
+
+    return False
+
+
+def shiftMove(patterns: List[List[int]], used: List[int], lengths: List[int]) -> bool:
+    """
+    This function moves one piece from the copy of the pattern with the lowest used length into the fullest copy of
+    another pattern with room for it. The number of base panels stays the same, but the used lengths move further
+    apart, which increases the sum of the squared used lengths by 2 * length * (target - source + length). Repeated
+    shifts empty the source copy, which is then dropped.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+    lengths (list): The order lengths, in the column order of the patterns.
+
+    Returns:
+        bool: True if a piece was moved.
+    """
+    copies = sorted((i for i in range(len(patterns)) if patterns[i][0] > 0), key=lambda i: used[i])
+    if not copies:
+        return False
+
+    source = copies[0]
+    targets = [i for i in copies if i != source or patterns[i][0] > 1]
+
+    for j in sorted(range(len(lengths)), key=lambda j: lengths[j], reverse=True):
+        if patterns[source][j + 1] == 0:
+            continue
+
+        fits = [i for i in targets if base_length - used[i] >= lengths[j]]
+        if not fits:
+            continue
+
+        target = min(fits, key=lambda i: base_length - used[i])
+        target_counts = patterns[target][1:]
+        target_counts[j] += 1
+        source_counts = patterns[source][1:]
+        source_counts[j] -= 1
+
+        splitCopy(patterns, used, target, target_counts, used[target] + lengths[j])
+        splitCopy(patterns, used, source, source_counts, used[source] - lengths[j])
+
+        return True
+
+    return False
+
+
+def swapMove(patterns: List[List[int]], used: List[int], lengths: List[int]) -> bool:
+    """
+    This function swaps a piece of the copy of the pattern with the lowest used length with a shorter piece of a copy
+    of another pattern, choosing the swap that fills the other copy the most. Like `shiftMove`, it keeps the number of
+    base panels and moves the used lengths further apart.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+    lengths (list): The order lengths, in the column order of the patterns.
+
+    Returns:
+        bool: True if two pieces were swapped.
+    """
+    copies = sorted((i for i in range(len(patterns)) if patterns[i][0] > 0), key=lambda i: used[i])
+    if not copies:
+        return False
+
+    source = copies[0]
+    best = None
+
+    for target in copies:
+        if target == source and patterns[target][0] == 1:
+            continue
+        for a in range(len(lengths)):
+            if patterns[source][a + 1] == 0:
+                continue
+            for b in range(len(lengths)):
+                gain = lengths[a] - lengths[b]
+                if patterns[target][b + 1] == 0 or gain <= 0 or used[target] + gain > base_length:
+                    continue
+                if best is None or used[target] + gain > best[0]:
+                    best = (used[target] + gain, target, a, b)
+
+    if best is None:
+        return False
+
+    _, target, a, b = best
+    gain = lengths[a] - lengths[b]
+
+    target_counts = patterns[target][1:]
+    target_counts[a] += 1
+    target_counts[b] -= 1
+    source_counts = patterns[source][1:]
+    source_counts[a] -= 1
+    source_counts[b] += 1
+
+    splitCopy(patterns, used, target, target_counts, used[target] + gain)
+    splitCopy(patterns, used, source, source_counts, used[source] - gain)
+
+    return True
+
+
+def repackMove(patterns: List[List[int]], used: List[int], order_length_quantities,
+               panels: int = REPACK_PANELS, pattern_generator=None) -> bool:
+    """
+    This function cuts the pieces of the copies with the most waste again, with the knapsack pattern with the least
+    waste for the remaining pieces each time. The new patterns are kept if they use fewer base panels, or the same
+    number of base panels with the used lengths further apart, so the waste is collected in the last panel.
+
+    Parameters:
+    patterns (list): The patterns of the individual, updated in place.
+    used (list): The used length of each pattern, updated in place.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    panels (int): The number of copies to cut again.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+
+    Returns:
+        bool: True if the copies were replaced.
+    """
+    copies = sorted((i for i in range(len(patterns)) if patterns[i][0] > 0), key=lambda i: used[i])
+
+    # Take the two copies with the most waste and random other copies, as many copies of a pattern as it is cut
+    panel_copies = [i for i in copies for _ in range(patterns[i][0])]
+    if len(panel_copies) < 2:
+        return False
+
+    selected = panel_copies[:2] + random.sample(panel_copies[2:], min(panels - 2, len(panel_copies) - 2))
+
+    pieces = np.zeros(len(order_length_quantities), dtype=np.int64)
+    for i in selected:
+        pieces += patterns[i][1:]
+
+    # The generator of the subset keeps the patterns of the residual demands solved before
+    generator = pattern_generator
+    if generator is None:
+        generator = functions_patterns.PatternGenerator(order_length_quantities, base_length, cache_size=0)
+
+    repacked = []
+    while pieces.sum() > 0:
+        counts = generator.best(pieces)
+        if counts is None:
+            return False
+        times = applyPattern(pieces, counts)
+        repacked.extend([counts.tolist()] * times)
+
+    lengths = lengths_array(order_length_quantities)
+    new_used = [int(counts @ lengths) for counts in np.array(repacked, dtype=np.int64)]
+
+    if len(repacked) > len(selected) or (len(repacked) == len(selected) and
+                                         sum(u * u for u in new_used) <= sum(used[i] * used[i] for i in selected)):
+        return False
+
+    for i in selected:
+        patterns[i][0] -= 1
+    for counts, used_length in zip(repacked, new_used):
+        patterns.append([1] + counts)
+        used.append(used_length)
+
+    return True
+
+
+def localSearch(individual, order_length_quantities, max_moves=LOCAL_SEARCH_MOVES, budget=None,
+                pattern_generator=None):
+    """
+    This function is the local search mutation operator. Every round applies the first improving move of: merging two
+    low utilization patterns or moving all pieces of a high waste pattern into patterns with spare room, which drop one
+    base panel, shifting or swapping a single piece out of the pattern with the most waste, which collect the waste in
+    fewer panels, or cutting the pieces of a few copies again. Each move is scored by its change in base panels and
+    used lengths only, without evaluating the individual. Emptied patterns are dropped and equal patterns are merged
+    afterwards. The search stops when the time budget of the generation is exhausted.
+
+    Parameters:
+    individual (Individual): The individual to improve, updated in place.
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    max_moves (int): The maximum number of moves.
+    budget (TimeBudget): The time budget of the generation, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, used by the repack move,
+    optional.
+
+    Returns:
+        tuple: A tuple containing the individual.
+    """
+    if budget is not None and budget.exhausted():
+        return individual,
+
+    as_array = isinstance(individual[0], np.ndarray)
+    patterns = array_to_individual(individual[0]) if as_array else [pattern.copy() for pattern in individual[0]]
+    lengths = list(order_length_quantities.keys())
+    used = [calc_total_length(lengths, pattern) for pattern in patterns]
+
+    # The repack move is random, so a round without an improving move does not end the search
+    moves = 0
+    for _ in range(max_moves):
+        if budget is not None and budget.exhausted():
+            break
+        if (mergeMove(patterns, used) or emptyMove(patterns, used, lengths) or shiftMove(patterns, used, lengths)
+                or swapMove(patterns, used, lengths)
+                or repackMove(patterns, used, order_length_quantities, pattern_generator=pattern_generator)):
+            moves += 1
+
+    if moves > 0:
+        merged = {}
+        for pattern in patterns:
+            if pattern[0] > 0 and any(pattern[1:]):
+                cut = tuple(pattern[1:])
+                merged[cut] = merged.get(cut, 0) + pattern[0]
+        patterns = [[frequency] + list(cut) for cut, frequency in merged.items()]
+
+        individual[0] = individual_to_array(patterns) if as_array else patterns
+
+    return individual,
+
+
 def sum_baseLength(ind: List[List[int]]) -> int:
     """
     This function calculates the total amount of the base lengths used in a list of patterns.
@@ -643,6 +1571,9 @@ def sum_baseLength(ind: List[List[int]]) -> int:
     Returns:
         int: The total length of the base patterns.
     """
+    if isinstance(ind, np.ndarray):
+        return int(ind[:, 0].sum()) if ind.size else 0
+
     total = 0
     for pattern in ind:
         if pattern:  # make sure the list is not empty
@@ -652,7 +1583,8 @@ def sum_baseLength(ind: List[List[int]]) -> int:
 
 def measure_time(func):
     """
-    This is a decorator function that measures and prints the execution time of the decorated function.
+    This is a decorator function that measures the execution time of the decorated function, and prints it if VERBOSE
+    is set.
 
     Parameters:
     func (function): The function to be decorated.
@@ -665,7 +1597,8 @@ def measure_time(func):
         start_time = time.perf_counter()
         result = func(*args, **kwargs)
         end_time = time.perf_counter()
-        print(f'Finished {func.__name__} in {end_time - start_time:.6f} seconds')
+        if VERBOSE:
+            print(f'Finished {func.__name__} in {end_time - start_time:.6f} seconds')
         return result
 
     return wrapper
\ No newline at end of file
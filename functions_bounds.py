@@ -0,0 +1,75 @@
+import math
+import numpy as np
+
+
+# Lower bound functions for the cutting stock problem
+# Used in the GA_CSP file to stop the Genetic Algorithm early and to report the optimality gap
+
+def l1_bound(order_length_quantities, base_length) -> int:
+    """
+    This function calculates the continuous lower bound (L1) on the number of base panels, which is the total length
+    of all orders divided by the base length, rounded up.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    base_length (int): The length of a base panel.
+
+    Returns:
+        int: The lower bound on the number of base panels.
+    """
+    total_length = sum(int(length) * int(quantity) for length, quantity in order_length_quantities.items())
+
+    return math.ceil(total_length / base_length)
+
+
+def l2_bound(order_length_quantities, base_length) -> int:
+    """
+    This function calculates the lower bound L2 of Martello and Toth on the number of base panels. For every
+    threshold alpha up to half the base length, the orders are split into orders that need a panel of their own
+    (longer than the base length minus alpha), long orders that cannot share a panel with each other (longer than half
+    the base length), and the orders of at least alpha that fit in half a panel. The bound adds the panels of the first
+    two groups and the panels needed for the length of the third group that does not fit in the long order panels.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    base_length (int): The length of a base panel.
+
+    Returns:
+        int: The lower bound on the number of base panels.
+    """
+    lengths = np.fromiter(order_length_quantities.keys(), dtype=np.int64, count=len(order_length_quantities))
+    quantities = np.fromiter(order_length_quantities.values(), dtype=np.int64, count=len(order_length_quantities))
+
+    half = base_length / 2
+    bound = 0
+
+    # The bound only changes at the order lengths, so alpha is 0 or one of the order lengths up to half a panel
+    for alpha in np.concatenate(([0], lengths[lengths <= half])):
+        own_panel = lengths > base_length - alpha
+        long = (lengths <= base_length - alpha) & (lengths > half)
+        short = (lengths <= half) & (lengths >= alpha)
+
+        nr_of_long = int(quantities[long].sum())
+        free_length = nr_of_long * base_length - int(lengths[long] @ quantities[long])
+        short_length = int(lengths[short] @ quantities[short])
+
+        excess_length = max(0, short_length - free_length)
+
+        alpha_bound = int(quantities[own_panel].sum()) + nr_of_long + math.ceil(excess_length / base_length)
+        bound = max(bound, alpha_bound)
+
+    return bound
+
+
+def lower_bound(order_length_quantities, base_length) -> int:
+    """
+    This function calculates the best available lower bound on the number of base panels of a subset.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    base_length (int): The length of a base panel.
+
+    Returns:
+        int: The lower bound on the number of base panels.
+    """
+    return max(l1_bound(order_length_quantities, base_length), l2_bound(order_length_quantities, base_length))
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import numpy as np
+
+
+# Cache functions for the Genetic Algorithm
+# Used in the functions_GA and GA_CSP files to skip repeated evaluations of the same individual
+
+# The default number of individuals kept in a cache
+CACHE_SIZE = 100000
+
+
+def canonical_form(patterns) -> tuple:
+    """
+    This function creates the canonical form of an individual, which is the same for every individual that cuts the
+    same patterns the same number of times. Patterns with equal piece counts are merged by adding their frequencies,
+    patterns with a frequency of zero are dropped and the result is sorted into a hashable tuple.
+
+    Parameters:
+    patterns (list): The patterns of the individual, as a list of patterns or as a pattern matrix.
+
+    Returns:
+        tuple: A sorted tuple of (piece counts, frequency) pairs.
+    """
+    if isinstance(patterns, np.ndarray):
+        patterns = patterns.tolist()
+
+    merged = {}
+    for pattern in patterns:
+        cut = tuple(pattern[1:])
+        merged[cut] = merged.get(cut, 0) + pattern[0]
+
+    return tuple(sorted((cut, frequency) for cut, frequency in merged.items() if frequency != 0))
+
+
+class FitnessCache:
+    """
+    This class is a bounded least-recently-used cache for values of individuals, keyed by their canonical form. It
+    counts the hits and misses of the lookups.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        This function looks up the value of a key and marks it as recently used.
+
+        Parameters:
+        key (tuple): The canonical form of an individual.
+
+        Returns:
+            The cached value, or None if the key is not in the cache.
+        """
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        This function stores the value of a key, and removes the least recently used key if the cache is full.
+
+        Parameters:
+        key (tuple): The canonical form of an individual.
+        value: The value to store.
+
+        Returns:
+            None
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def statistics(self) -> dict:
+        """
+        This function returns the statistics of the cache.
+
+        Returns:
+            dict: The number of hits, misses, the hit rate and the number of cached keys.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'size': len(self.entries)}
+
+
+def replaceDuplicates(population, create_individual):
+    """
+    This function replaces every individual whose canonical form already occurs earlier in the population by a newly
+    created individual, so no evaluations are spent on clones.
+
+    Parameters:
+    population (list): The population, which is updated in place.
+    create_individual (function): The function that creates a new individual.
+
+    Returns:
+        int: The number of replaced duplicates.
+    """
+    seen = set()
+    duplicates = 0
+
+    for i, individual in enumerate(population):
+        key = canonical_form(individual[0])
+
+        if key in seen:
+            population[i] = create_individual()
+            duplicates += 1
+        else:
+            seen.add(key)
+
+    return duplicates
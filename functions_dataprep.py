@@ -1,6 +1,13 @@
 # Data parsing and preparation functions
 # These functions are used in the data.py file to prepare the data for the genetic algorithm
 
+# The columns that identify a subset of panels that can be cut from the same base panels
+SUBSET_COLUMNS = ['MateriaalPaneelTxt', 'Dikte', 'Hoogte']
+
+# The length of a base panel in the original plan
+BASE_LENGTH = 12450
+
+
 def create_base_panel_quantity(materials):
     """
     This function creates base panel quantity for each material in the materials' dictionary.
@@ -156,3 +163,34 @@ def performance_set(df_orders, subset_keys):
     return k, nr_of_panels, waste, total_material
 
 
+def prepare_subsets(df, base_length=BASE_LENGTH):
+    """
+    This function prepares all subsets of a day in one grouped pass over the dataframe, instead of one mask per
+    subset. For every subset (material, thickness, height) it returns the demand per panel length, like
+    `create_subsets`, and the performance of the original plan, like `performance_set`: the number of base panels,
+    the total rest length of the base panels and the material used. The subsets are in the order of `panel_count`, and
+    the lengths of a subset in the order in which they first appear.
+    :param df: dataframe
+    :param base_length: length of a base panel
+    :return: dictionary with subsets as keys and dictionaries with the 'demand', 'O_panels', 'O_waste' and
+    'O_material' of the subset as values
+    """
+    # Count the panels of every length of every subset at once
+    demand_counts = df.groupby(SUBSET_COLUMNS + ['Lengtepaneel'], sort=False).size()
+
+    demands = {}
+    for (material, thickness, height, length), count in demand_counts.items():
+        demands.setdefault((material, thickness, height), {})[int(length)] = int(count)
+
+    # The rest length of a base panel is taken from its first panel, like in `base_count`
+    base_panels = df.drop_duplicates(SUBSET_COLUMNS + ['Basisnummer'])
+    original_plan = base_panels.groupby(SUBSET_COLUMNS)['Restlengte'].agg(['size', 'sum'])
+
+    prepared = {}
+    for subset, nr_of_panels, waste in zip(original_plan.index, original_plan['size'], original_plan['sum']):
+        prepared[subset] = {'demand': demands[subset],
+                            'O_panels': int(nr_of_panels),
+                            'O_waste': int(waste),
+                            'O_material': int(nr_of_panels) * base_length}
+
+    return prepared
@@ -0,0 +1,252 @@
+import contextlib
+import csv
+import json
+import time
+from collections import Counter
+
+
+# Metrics functions for the Genetic Algorithm
+# Used in the functions_GA and GA_CSP files to time the stages of a run and count its events, per subset
+
+# The metrics that are collected, None when no metrics are collected
+current = None
+
+# The stage of a call when no metrics are collected
+NO_STAGE = contextlib.nullcontext()
+
+
+class Stage:
+    """
+    This class times one call of a stage, as a context manager that adds the duration to its metrics on exit.
+    """
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    This class holds the time and the number of calls of every stage of a run, and counters of its events, such as
+    the validations, invalid individuals, cache hits and evaluated patterns.
+    """
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.calls = Counter()
+        self.counters = Counter()
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def add(self, name, seconds):
+        """
+        This function adds one call of a stage.
+
+        Parameters:
+        name (str): The name of the stage.
+        seconds (float): The duration of the call.
+
+        Returns:
+            None
+        """
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+
+    def merge(self, other):
+        """
+        This function adds the stages and counters of other metrics to these metrics.
+
+        Parameters:
+        other (Metrics): The metrics to add.
+
+        Returns:
+            None
+        """
+        self.seconds.update(other.seconds)
+        self.calls.update(other.calls)
+        self.counters.update(other.counters)
+
+    def rates(self) -> dict:
+        """
+        This function calculates the rates of the counters: the share of validated individuals that is invalid, the
+        hit rate of the fitness cache and the average number of patterns per evaluated individual.
+
+        Returns:
+            dict: The rates that can be calculated from the counters.
+        """
+        rates = {}
+        if self.counters['validations']:
+            rates['invalid_rate'] = self.counters['invalid_individuals'] / self.counters['validations']
+        if self.counters['fitness_cache_hits'] + self.counters['fitness_cache_misses']:
+            rates['fitness_cache_hit_rate'] = self.counters['fitness_cache_hits'] / (
+                    self.counters['fitness_cache_hits'] + self.counters['fitness_cache_misses'])
+        if self.counters['evaluated_individuals']:
+            rates['patterns_per_individual'] = self.counters['evaluated_patterns'] / self.counters[
+                'evaluated_individuals']
+
+        return rates
+
+    def to_dict(self) -> dict:
+        """
+        This function returns the metrics as a dictionary that can be written as JSON.
+
+        Returns:
+            dict: The calls and seconds of every stage, the counters and the rates.
+        """
+        return {'stages': {name: {'calls': self.calls[name], 'seconds': self.seconds[name]} for name in self.seconds},
+                'counters': dict(self.counters),
+                'rates': self.rates()}
+
+    def to_row(self) -> dict:
+        """
+        This function returns the metrics as one flat row, with a seconds and calls column per stage.
+
+        Returns:
+            dict: The columns of the row.
+        """
+        row = {}
+        for name in self.seconds:
+            row[f'{name}_seconds'] = self.seconds[name]
+            row[f'{name}_calls'] = self.calls[name]
+        row.update(self.counters)
+        row.update(self.rates())
+
+        return row
+
+
+def stage(name):
+    """
+    This function returns the context manager that times one call of a stage in the current metrics, or a context
+    manager that does nothing when no metrics are collected.
+
+    Parameters:
+    name (str): The name of the stage.
+
+    Returns:
+        Stage: The context manager of the call.
+    """
+    return NO_STAGE if current is None else current.stage(name)
+
+
+def count(name, n=1):
+    """
+    This function adds to a counter of the current metrics, if metrics are collected.
+
+    Parameters:
+    name (str): The name of the counter.
+    n (int): The number to add.
+
+    Returns:
+        None
+    """
+    if current is not None:
+        current.counters[name] += n
+
+
+def merge(metrics):
+    """
+    This function adds metrics that were collected elsewhere, for example in a worker process, to the current metrics,
+    if metrics are collected.
+
+    Parameters:
+    metrics (Metrics): The metrics to add, None adds nothing.
+
+    Returns:
+        None
+    """
+    if current is not None and metrics is not None:
+        current.merge(metrics)
+
+
+def timed(name, func):
+    """
+    This function wraps a function so every call is timed as a stage of the current metrics.
+
+    Parameters:
+    name (str): The name of the stage.
+    func (function): The function to time.
+
+    Returns:
+        function: The timed function.
+    """
+
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument(toolbox, stages):
+    """
+    This function replaces the registered functions of a toolbox by timed functions.
+
+    Parameters:
+    toolbox (Toolbox): The toolbox.
+    stages (dict): The stage name of every alias of the toolbox that is timed, aliases that are not registered are
+    skipped.
+
+    Returns:
+        None
+    """
+    for alias, name in stages.items():
+        if hasattr(toolbox, alias):
+            toolbox.register(alias, timed(name, getattr(toolbox, alias)))
+
+
+@contextlib.contextmanager
+def collect(metrics=None):
+    """
+    This function collects the metrics of the code in its context. The metrics of a nested context are also added to
+    the metrics of the enclosing context, so a subset collects the metrics of the engine that solves it.
+
+    Parameters:
+    metrics (Metrics): The metrics to collect into, by default new metrics.
+
+    Returns:
+        Metrics: The collected metrics.
+    """
+    global current
+    previous = current
+    current = Metrics() if metrics is None else metrics
+
+    try:
+        yield current
+    finally:
+        if previous is not None:
+            previous.merge(current)
+        current = previous
+
+
+def write_records(records, path):
+    """
+    This function writes the metrics records of a run, one per subset, as a JSON list or as CSV rows, by the extension
+    of the path.
+
+    Parameters:
+    records (list): The records, dictionaries with the keys of the subset and the flat metrics columns.
+    path (str): The JSON or CSV file to write.
+
+    Returns:
+        None
+    """
+    if path.endswith('.json'):
+        with open(path, 'w') as file:
+            json.dump(records, file, indent=2, default=str)
+        return
+
+    columns = list(dict.fromkeys(column for record in records for column in record))
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(records)
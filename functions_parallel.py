@@ -0,0 +1,249 @@
+import contextlib
+import math
+import multiprocessing
+import random
+import time
+import numpy as np
+import functions_GA
+import functions_metrics
+
+
+# Process pool functions for the Genetic Algorithm
+# Used in the GA_CSP file to evaluate and mate individuals on several cores
+
+# Number of chunks per worker in every map call, larger chunks lower the pickling overhead per individual
+CHUNKS_PER_WORKER = 4
+
+# The subset context of a worker process, set once by `init_worker`
+worker_context = {}
+
+
+def init_worker(order_length_quantities, seed, pattern_index=None, pattern_generator=None, metrics=False):
+    """
+    This function initializes a worker process of the pool. It creates the DEAP creator classes that are needed to
+    unpickle individuals, stores the order length quantities of the subset so they are not sent with every task, and
+    seeds the random generator of the worker so the workers do not share the random state of the parent process.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    seed (int): The seed of the pool, combined with the identity of the worker.
+    pattern_index (PatternIndex): The pattern index of the subset, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+    metrics (bool): Whether the worker returns the metrics of every crossover to the parent process.
+
+    Returns:
+        None
+    """
+    functions_GA.setup_creator()
+    worker_context['order_length_quantities'] = order_length_quantities
+    worker_context['pattern_index'] = pattern_index
+    worker_context['pattern_generator'] = pattern_generator
+    worker_context['metrics'] = metrics
+
+    # A forked worker inherits the metrics of the parent process, which would never be read
+    functions_metrics.current = None
+
+    identity = multiprocessing.current_process()._identity
+    random.seed(seed + (identity[0] if identity else 0))
+
+
+def create_pool(order_length_quantities, workers, pattern_index=None, pattern_generator=None, metrics=False):
+    """
+    This function creates a process pool whose workers are initialized with the context of the given subset.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    workers (int): The number of worker processes.
+    pattern_index (PatternIndex): The pattern index of the subset, optional.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+    metrics (bool): Whether the workers return the metrics of every crossover to the parent process.
+
+    Returns:
+        Pool: The process pool.
+    """
+    return multiprocessing.Pool(processes=workers, initializer=init_worker,
+                                initargs=(order_length_quantities, random.getrandbits(32), pattern_index,
+                                          pattern_generator, metrics))
+
+
+def chunk_size(nr_of_items, workers):
+    """
+    This function calculates the chunk size for distributing the given number of items over the workers.
+
+    Parameters:
+    nr_of_items (int): The number of items to distribute.
+    workers (int): The number of worker processes.
+
+    Returns:
+        int: The number of items per chunk.
+    """
+    return max(1, math.ceil(nr_of_items / (workers * CHUNKS_PER_WORKER)))
+
+
+def chunked_map(pool, workers):
+    """
+    This function creates a map function for the toolbox that distributes the items over the pool in chunks.
+
+    Parameters:
+    pool (Pool): The process pool.
+    workers (int): The number of worker processes.
+
+    Returns:
+        function: The map function.
+    """
+
+    def map_function(func, iterable):
+        items = list(iterable)
+        return pool.map(func, items, chunksize=chunk_size(len(items), workers))
+
+    return map_function
+
+
+def chunked_imap(pool, workers):
+    """
+    This function creates a lazy map function for the toolbox that distributes the items over the pool in chunks, like
+    `chunked_map`, but returns the results one by one as they are done, so the caller can stop waiting for them.
+
+    Parameters:
+    pool (Pool): The process pool.
+    workers (int): The number of worker processes.
+
+    Returns:
+        function: The lazy map function.
+    """
+
+    def imap_function(func, iterable):
+        items = list(iterable)
+        return pool.imap(func, items, chunksize=chunk_size(len(items), workers))
+
+    return imap_function
+
+
+def evaluateChunk(individuals):
+    """
+    This function evaluates a chunk of individuals in a worker process with the batch fitness function.
+
+    Parameters:
+    individuals (list): The individuals to evaluate.
+
+    Returns:
+        np.ndarray: The material used by each individual.
+    """
+    return functions_GA.populationWaste(individuals,
+                                        order_length_quantities=worker_context['order_length_quantities'])
+
+
+def evaluateParallel(individuals, pool, workers):
+    """
+    This function evaluates a batch of individuals by splitting it into chunks and evaluating the chunks in the pool.
+
+    Parameters:
+    individuals (list): The individuals to evaluate.
+    pool (Pool): The process pool.
+    workers (int): The number of worker processes.
+
+    Returns:
+        np.ndarray: The material used by each individual, in the order of the batch.
+    """
+    size = chunk_size(len(individuals), workers)
+    chunks = [individuals[i:i + size] for i in range(0, len(individuals), size)]
+
+    return np.concatenate(pool.map(evaluateChunk, chunks))
+
+
+def mate(parents):
+    """
+    This function creates two offspring from a pair of parents in a worker process with the crossover function. The
+    metrics and diagnostics of a worker are not seen by the parent process, so the crossover is timed as a stage of its
+    own metrics, and these are returned with the diagnostics of the crossover, such as the validations.
+
+    Parameters:
+    parents (tuple): The two parent individuals.
+
+    Returns:
+        tuple: A tuple containing the two offspring individuals, the metrics of the crossover, None if no metrics are
+        collected, and the diagnostics of the crossover.
+    """
+    ind1, ind2 = parents
+    order_length_quantities = worker_context['order_length_quantities']
+    diagnostics = functions_GA.diagnostics.copy()
+
+    with functions_metrics.collect() if worker_context['metrics'] else contextlib.nullcontext() as metrics:
+        with functions_metrics.stage("crossover"):
+            offspring = functions_GA.crossoverFunction(ind1, ind2, order_length_quantities=order_length_quantities,
+                                                       pattern_index=worker_context['pattern_index'],
+                                                       pattern_generator=worker_context['pattern_generator'])
+
+    return offspring, metrics, functions_GA.diagnostics - diagnostics
+
+
+def varAndParallel(population, toolbox, cxpb, mutpb, deadline=None):
+    """
+    This function applies crossover and mutation like `algorithms.varAnd`, but all selected pairs are mated at once in
+    the pool through `toolbox.map`. The pairs that mate are drawn before the crossover, so the random sequence differs
+    from the single process variation. The metrics and diagnostics of the crossovers in the workers are added to those
+    of this process, so the crossover seconds are summed over the workers and can exceed the variation seconds. With a
+    deadline, the offspring are taken from the pool as they are done, and the variation is abandoned as soon as the
+    deadline has passed.
+
+    Parameters:
+    population (list): The individuals to vary.
+    toolbox (Toolbox): The toolbox with the "map", "imap", "mateParallel" and "mutate" functions.
+    cxpb (float): The probability of mating two individuals.
+    mutpb (float): The probability of mutating an individual.
+    deadline (float): The `time.perf_counter` value at which the variation is abandoned, optional.
+
+    Returns:
+        list: The varied individuals, None if the variation was abandoned at the deadline.
+    """
+    # Cloning a large population takes a while, so the deadline is also checked between the clones
+    offspring = []
+    for ind in population:
+        offspring.append(toolbox.clone(ind))
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+
+    # Select the pairs to mate and create their offspring in the pool
+    mating = [i for i in range(1, len(offspring), 2) if random.random() < cxpb]
+    pairs = [(offspring[i - 1], offspring[i]) for i in mating]
+    if deadline is None:
+        children = toolbox.map(toolbox.mateParallel, pairs)
+    else:
+        children = toolbox.imap(toolbox.mateParallel, pairs)
+
+    for i, ((child1, child2), metrics, diagnostics) in zip(mating, children):
+        offspring[i - 1], offspring[i] = child1, child2
+        functions_metrics.merge(metrics)
+        functions_GA.diagnostics.update(diagnostics)
+        del offspring[i - 1].fitness.values, offspring[i].fitness.values
+
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+
+    for i in range(len(offspring)):
+        if random.random() < mutpb:
+            offspring[i], = toolbox.mutate(offspring[i])
+            del offspring[i].fitness.values
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+
+    return offspring
+
+
+def register_pool(toolbox, pool, workers):
+    """
+    This function registers the parallel map, lazy map, evaluation and crossover functions of a pool in the toolbox.
+
+    Parameters:
+    toolbox (Toolbox): The toolbox of the subset.
+    pool (Pool): The process pool, initialized with the context of the same subset.
+    workers (int): The number of worker processes.
+
+    Returns:
+        None
+    """
+    toolbox.register("map", chunked_map(pool, workers))
+    toolbox.register("imap", chunked_imap(pool, workers))
+    toolbox.register("evaluateBatch", evaluateParallel, pool=pool, workers=workers)
+    toolbox.register("mateParallel", mate)
@@ -0,0 +1,285 @@
+import math
+import random
+import time
+import numpy as np
+import functions_cache
+
+
+# Cutting pattern functions for the Genetic Algorithm
+# Used in the functions_GA and GA_CSP files to take patterns from a precomputed index instead of rebuilding them
+
+# The maximum number of patterns that is enumerated for one subset
+PATTERN_INDEX_CAP = 50000
+
+# The number of partial patterns visited per enumerated pattern before the enumeration stops
+EXPLORE_FACTOR = 20
+
+# The number of partial patterns visited between two checks of the deadline of the enumeration
+DEADLINE_CHECK_VISITS = 1000
+
+# The number of lowest waste patterns a random pattern is chosen from
+INDEX_CHOICES = 5
+
+# The number of residual demands whose best pattern is kept by the pattern generator of a subset
+PATTERN_CACHE_SIZE = 10000
+
+
+def enumerate_patterns(lengths, quantities, base_length, cap=PATTERN_INDEX_CAP, deadline=None):
+    """
+    This function enumerates the maximal feasible cutting patterns of a subset. A pattern is feasible if its total
+    length fits in the base length and it does not cut more pieces of a length than demanded. It is maximal if no
+    other demanded piece fits in its remaining length. The enumeration stops after `cap` patterns, after visiting
+    EXPLORE_FACTOR times `cap` partial patterns, or at the deadline.
+
+    Parameters:
+    lengths (list): The order lengths.
+    quantities (list): The demand for each order length.
+    base_length (int): The length of a base panel.
+    cap (int): The maximum number of patterns.
+    deadline (float): The `time.perf_counter` value at which the enumeration stops, optional.
+
+    Returns:
+        tuple: A list of patterns, each a list of piece counts in the order of the lengths, and a boolean that is True
+        if all maximal patterns were enumerated.
+    """
+    # Enumerate the longest pieces first, so the patterns with the least waste are found early
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    patterns = []
+    counts = [0] * len(lengths)
+    visits = [0]
+    expired = [False]
+
+    def extend(position, remaining):
+        visits[0] += 1
+        if len(patterns) >= cap or visits[0] > cap * EXPLORE_FACTOR or expired[0]:
+            return
+        if deadline is not None and visits[0] % DEADLINE_CHECK_VISITS == 0 and time.perf_counter() >= deadline:
+            expired[0] = True
+            return
+
+        if position == len(order):
+            # Keep the pattern if no other demanded piece fits in the remaining length
+            if all(counts[i] == quantities[i] or lengths[i] > remaining for i in order):
+                patterns.append(counts.copy())
+            return
+
+        i = order[position]
+        for count in range(min(quantities[i], remaining // lengths[i]), -1, -1):
+            counts[i] = count
+            extend(position + 1, remaining - count * lengths[i])
+        counts[i] = 0
+
+    extend(0, base_length)
+
+    return patterns, len(patterns) < cap and visits[0] <= cap * EXPLORE_FACTOR and not expired[0]
+
+
+class PatternIndex:
+    """
+    This class holds the maximal feasible cutting patterns of a subset, enumerated once and sorted by waste. If the
+    enumeration is complete, every pattern that fits in a residual demand is a clipped maximal pattern, so the minimal
+    waste pattern for any residual demand is found with one vectorized pass over the index. If the enumeration stopped
+    at its cap or its deadline (`complete` is False), the index may have no pattern for some residual demands, and the
+    caller has to cut those with constructed patterns.
+    """
+
+    def __init__(self, order_length_quantities, base_length, cap=PATTERN_INDEX_CAP, deadline=None):
+        self.base_length = base_length
+        self.lengths = np.fromiter(order_length_quantities.keys(), dtype=np.int64, count=len(order_length_quantities))
+        quantities = [int(quantity) for quantity in order_length_quantities.values()]
+
+        patterns, self.complete = enumerate_patterns(self.lengths.tolist(), quantities, base_length, cap=cap,
+                                                     deadline=deadline)
+        patterns = np.array(patterns, dtype=np.int64).reshape(len(patterns), len(self.lengths))
+
+        waste = base_length - patterns @ self.lengths
+        order = np.argsort(waste, kind='stable')
+
+        self.patterns = patterns[order]
+        self.waste = waste[order]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def clipped(self, demand):
+        """
+        This function clips every pattern of the index to the given demand.
+
+        Parameters:
+        demand (np.ndarray): The residual demand for each order length.
+
+        Returns:
+            tuple: The clipped patterns and their used length.
+        """
+        patterns = np.minimum(self.patterns, demand)
+        return patterns, patterns @ self.lengths
+
+    def best(self, demand):
+        """
+        This function returns the pattern with the least waste that fits in the given demand.
+
+        Parameters:
+        demand (np.ndarray): The residual demand for each order length.
+
+        Returns:
+            np.ndarray: The piece counts of the pattern, or None if no piece of the demand fits.
+        """
+        patterns, used_length = self.clipped(demand)
+        best = int(np.argmax(used_length))
+
+        return patterns[best] if used_length[best] > 0 else None
+
+    def sample(self, demand, choices=INDEX_CHOICES):
+        """
+        This function returns a random pattern among the patterns with the least waste that fit in the given demand.
+
+        Parameters:
+        demand (np.ndarray): The residual demand for each order length.
+        choices (int): The number of lowest waste patterns to choose from.
+
+        Returns:
+            np.ndarray: The piece counts of the pattern, or None if no piece of the demand fits.
+        """
+        patterns, used_length = self.clipped(demand)
+
+        candidates = np.flatnonzero(used_length > 0)
+        if len(candidates) == 0:
+            return None
+
+        if len(candidates) > choices:
+            candidates = candidates[np.argpartition(-used_length[candidates], choices - 1)[:choices]]
+
+        return patterns[random.choice(sorted(candidates.tolist()))]
+
+
+def bounded_knapsack(weights, values, bounds, capacity):
+    """
+    This function solves the bounded knapsack problem with dynamic programming over the capacity. It maximizes the
+    total value of the pieces in a pattern, where each length can be cut at most its bound times and the total length
+    fits in the capacity. Every bounded piece is split into 0/1 items of 1, 2, 4, ... pieces, and the weights are
+    divided by their greatest common divisor to shorten the table.
+
+    Parameters:
+    weights (np.ndarray): The order lengths.
+    values (np.ndarray): The value of one piece of each order length.
+    bounds (np.ndarray): The maximum number of pieces of each order length.
+    capacity (int): The length of a base panel.
+
+    Returns:
+        tuple: The piece counts of the best pattern and its total value.
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+
+    divisor = int(np.gcd.reduce(np.append(weights, capacity)))
+    weights = weights // divisor
+    capacity = capacity // divisor
+
+    # Split every bounded piece into 0/1 items of a power of two pieces
+    items = []
+    for i in range(len(weights)):
+        remaining = min(int(bounds[i]), capacity // int(weights[i])) if values[i] > 0 else 0
+        copies = 1
+        while remaining > 0:
+            taken = min(copies, remaining)
+            items.append((i, taken))
+            remaining -= taken
+            copies *= 2
+
+    # best[c] is the highest value of a pattern with a total length of at most c
+    best = np.zeros(capacity + 1)
+    taken_items = np.zeros((len(items), capacity + 1), dtype=bool)
+
+    for n, (i, copies) in enumerate(items):
+        weight = int(weights[i]) * copies
+        candidate = best[:capacity + 1 - weight] + values[i] * copies
+        improved = candidate > best[weight:] + 1e-12
+
+        taken_items[n, weight:] = improved
+        best[weight:] = np.where(improved, candidate, best[weight:])
+
+    # Reconstruct the pattern from the items taken at the full capacity
+    counts = np.zeros(len(weights), dtype=np.int64)
+    remaining_capacity = capacity
+    for n in range(len(items) - 1, -1, -1):
+        if taken_items[n, remaining_capacity]:
+            i, copies = items[n]
+            counts[i] += copies
+            remaining_capacity -= int(weights[i]) * copies
+
+    return counts, float(best[capacity])
+
+
+class PatternGenerator:
+    """
+    This class generates the pattern with the least waste for a residual demand of a subset, which is the bounded
+    knapsack pattern with the longest used length. The lengths are scaled by their greatest common divisor once per
+    subset, every residual demand is solved with a bitset dynamic program over the base length, and the patterns are
+    memoized in a bounded cache keyed by the residual demand.
+    """
+
+    def __init__(self, order_length_quantities, base_length, cache_size=PATTERN_CACHE_SIZE):
+        self.lengths = np.fromiter(order_length_quantities.keys(), dtype=np.int64, count=len(order_length_quantities))
+
+        divisor = math.gcd(base_length, *self.lengths.tolist())
+        self.weights = [length // divisor for length in self.lengths.tolist()]
+        self.capacity = base_length // divisor
+        self.mask = (1 << (self.capacity + 1)) - 1
+
+        self.cache = functions_cache.FitnessCache(cache_size)
+
+    def solve(self, demand):
+        """
+        This function solves the bounded knapsack problem for the given demand. Bit c of the bitset is set when a used
+        length of c can be cut, and every bounded piece is added as 0/1 items of 1, 2, 4, ... pieces. The pattern is
+        reconstructed from the bitsets before every item.
+
+        Parameters:
+        demand (tuple): The residual demand for each order length.
+
+        Returns:
+            np.ndarray: The piece counts of the pattern with the longest used length.
+        """
+        reachable = 1
+        layers = []
+
+        for i, weight in enumerate(self.weights):
+            remaining = min(demand[i], self.capacity // weight)
+            copies = 1
+            while remaining > 0:
+                taken = min(copies, remaining)
+                layers.append((i, taken, reachable))
+                reachable |= (reachable << (weight * taken)) & self.mask
+                remaining -= taken
+                copies *= 2
+
+        counts = np.zeros(len(self.weights), dtype=np.int64)
+        used_length = reachable.bit_length() - 1
+
+        # An item is part of the pattern if the used length was not reachable before the item
+        for i, taken, before in reversed(layers):
+            if not (before >> used_length) & 1:
+                counts[i] += taken
+                used_length -= self.weights[i] * taken
+
+        return counts
+
+    def best(self, demand):
+        """
+        This function returns the pattern with the least waste that fits in the given demand, from the cache if the
+        demand was solved before.
+
+        Parameters:
+        demand (np.ndarray): The residual demand for each order length.
+
+        Returns:
+            np.ndarray: The piece counts of the pattern, or None if no piece of the demand fits.
+        """
+        key = tuple(demand.tolist())
+        counts = self.cache.get(key)
+
+        if counts is None:
+            counts = self.solve(key)
+            self.cache.put(key, counts)
+
+        return counts.copy() if counts.any() else None
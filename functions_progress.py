@@ -0,0 +1,138 @@
+import contextlib
+import json
+import os
+import time
+
+
+# Progress log functions for the Genetic Algorithm
+# Used in the GA_CSP file to stream the statistics of every generation to an append-only JSON lines file
+
+# The progress log that the generations are written to, None when no progress is logged
+current = None
+
+
+def json_value(value):
+    """
+    This function converts a value that JSON cannot encode, such as a NumPy number, to a value that it can encode.
+
+    Parameters:
+    value: The value.
+
+    Returns:
+        The Python number of a NumPy number, otherwise the string of the value.
+    """
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+class ProgressLog:
+    """
+    This class appends progress records to a JSON lines file, one JSON object per line. Every record carries the keys
+    of the log, such as the date and the subset, and the time it was written. Every line is flushed, so a running
+    batch can be followed with `tail -f` and the file can be analysed offline. The file is opened in append mode, so
+    several processes can log to the same file.
+    """
+
+    def __init__(self, path, **keys):
+        self.path = path
+        self.keys = keys
+        self.start = time.perf_counter()
+        self.file = None
+
+    def write(self, event, **fields):
+        """
+        This function appends one record to the file.
+
+        Parameters:
+        event (str): The kind of record, for example "generation" or "result".
+        fields: The fields of the record.
+
+        Returns:
+            None
+        """
+        if self.file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.path, 'a')
+
+        record = dict(self.keys, event=event, time=time.time(), **fields)
+        self.file.write(json.dumps(record, default=json_value) + '\n')
+        self.file.flush()
+
+    def generation(self, gen, population, halloffame, logbook) -> bool:
+        """
+        This function writes the statistics of a generation. It has the signature of the callback of `eaBatch`, and
+        never stops the run.
+
+        Parameters:
+        gen (int): The generation.
+        population (list): The population of the generation.
+        halloffame (HallOfFame): The hall of fame, optional.
+        logbook (Logbook): The logbook, with the record of the generation last.
+
+        Returns:
+            bool: False, the run continues.
+        """
+        record = logbook[-1]
+        # The fitness of DEAP compares by weighted value, so the best individual has the largest fitness
+        best = halloffame[0] if halloffame is not None and len(halloffame) else max(population,
+                                                                                    key=lambda ind: ind.fitness)
+
+        self.write("generation", gen=gen, nevals=int(record['nevals']), min=float(record.get('min', 'nan')),
+                   avg=float(record.get('avg', 'nan')), best_material=float(best.fitness.values[0]),
+                   elapsed=time.perf_counter() - self.start)
+
+        return False
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+@contextlib.contextmanager
+def stream(path, **keys):
+    """
+    This function logs the progress of the code in its context to a JSON lines file, with the given keys in every
+    record. Without a path no progress is logged.
+
+    Parameters:
+    path (str): The JSON lines file, None disables the progress log.
+    keys: The keys of every record, for example the date and the subset.
+
+    Returns:
+        ProgressLog: The progress log, None without a path.
+    """
+    global current
+    previous = current
+    current = None if path is None else ProgressLog(path, **keys)
+
+    try:
+        yield current
+    finally:
+        if current is not None:
+            current.close()
+        current = previous
+
+
+def with_progress(callback=None):
+    """
+    This function returns a callback for `eaBatch` that writes every generation to the current progress log and then
+    calls the given callback.
+
+    Parameters:
+    callback (function): The callback of the caller, optional.
+
+    Returns:
+        function: The combined callback, or the given callback if no progress is logged.
+    """
+    if current is None:
+        return callback
+
+    progress = current
+
+    def progress_callback(gen, population, halloffame, logbook):
+        progress.generation(gen, population, halloffame, logbook)
+        return callback is not None and callback(gen, population, halloffame, logbook)
+
+    return progress_callback
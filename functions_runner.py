@@ -0,0 +1,290 @@
+import logging
+import os
+import socket
+import sqlite3
+import time
+import multiprocessing
+import pandas as pd
+
+
+# Multi-day runner functions
+# Used in the GA_CSP file to optimize many production days on several processes or machines
+
+# Seconds after which a claimed day is considered to belong to a crashed worker and can be claimed again
+STALE_CLAIM_SECONDS = 6 * 60 * 60
+
+# Number of times a failing day is retried before it stays failed
+MAX_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteJobQueue:
+    """
+    This class is a job queue of production days, stored in a SQLite database file. Workers on one machine, or on
+    several machines that share the file, claim days from the queue until no day is left. A finished day is never
+    claimed again, and a day claimed by a crashed worker is released after `stale_seconds`, so a stopped run resumes
+    where it left off. Any object with the same `add_days`, `claim`, `complete` and `fail` methods can replace it.
+    """
+
+    def __init__(self, path, stale_seconds=STALE_CLAIM_SECONDS):
+        self.path = path
+        self.stale_seconds = stale_seconds
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS jobs (day TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                               "worker TEXT, claimed_at REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                               "result_path TEXT, error TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def add_days(self, days):
+        """
+        This function adds days to the queue. Days that are already in the queue keep their status.
+
+        Parameters:
+        days (list): The days to add, as ISO date strings.
+
+        Returns:
+            None
+        """
+        with self._connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO jobs (day, status) VALUES (?, 'pending')",
+                                   [(day,) for day in days])
+
+    def claim(self, worker, days=None):
+        """
+        This function claims the first day that is pending, failed fewer than MAX_ATTEMPTS times, or claimed by a
+        worker that has not finished it within `stale_seconds`. A worker only claims the days it has the data of, so
+        days of an earlier run or of other machines in the same file are left to the workers that have them.
+
+        Parameters:
+        worker (str): The name of the claiming worker.
+        days (set): The days the worker can optimize, by default all days.
+
+        Returns:
+            str: The claimed day, or None if no day is left.
+        """
+        now = time.time()
+        connection = self._connect()
+        try:
+            # Lock the database for writing, so no other worker claims the same day
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                "SELECT day FROM jobs WHERE status = 'pending' OR (status = 'failed' AND attempts < ?) "
+                "OR (status = 'running' AND claimed_at < ?) ORDER BY day",
+                (MAX_ATTEMPTS, now - self.stale_seconds))
+            row = next((row for row in rows if days is None or row[0] in days), None)
+
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            connection.execute("UPDATE jobs SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                               "WHERE day = ?", (worker, now, row[0]))
+            connection.execute("COMMIT")
+            return row[0]
+        finally:
+            connection.close()
+
+    def complete(self, day, result_path):
+        """
+        This function marks a day as done.
+
+        Parameters:
+        day (str): The finished day.
+        result_path (str): The file with the results of the day, or None if the day was skipped.
+
+        Returns:
+            None
+        """
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = 'done', result_path = ?, error = NULL WHERE day = ?",
+                               (result_path, day))
+
+    def fail(self, day, error):
+        """
+        This function marks a day as failed, so it is retried until it failed MAX_ATTEMPTS times.
+
+        Parameters:
+        day (str): The failed day.
+        error (str): The error message.
+
+        Returns:
+            None
+        """
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = 'failed', error = ? WHERE day = ?", (error, day))
+
+    def status(self):
+        """
+        This function counts the days per status.
+
+        Returns:
+            dict: A dictionary with the status as key and the number of days as value.
+        """
+        with self._connect() as connection:
+            return dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def results(self):
+        """
+        This function returns the result files of all finished days.
+
+        Returns:
+            dict: A dictionary with the day as key and the result file as value, None for skipped days.
+        """
+        with self._connect() as connection:
+            return dict(connection.execute("SELECT day, result_path FROM jobs WHERE status = 'done' "
+                                           "ORDER BY day").fetchall())
+
+
+class LocalJobQueue:
+    """
+    This class is an in-memory stand-in for the SQLiteJobQueue, for a single worker in the current process. It keeps no
+    state between runs, so it cannot resume.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add_days(self, days):
+        for day in days:
+            self.jobs.setdefault(day, {'status': 'pending', 'attempts': 0, 'result_path': None})
+
+    def claim(self, worker, days=None):
+        for day in sorted(self.jobs):
+            job = self.jobs[day]
+            if days is not None and day not in days:
+                continue
+            if job['status'] == 'pending' or (job['status'] == 'failed' and job['attempts'] < MAX_ATTEMPTS):
+                job['status'] = 'running'
+                job['attempts'] += 1
+                return day
+        return None
+
+    def complete(self, day, result_path):
+        self.jobs[day].update(status='done', result_path=result_path)
+
+    def fail(self, day, error):
+        self.jobs[day].update(status='failed', error=error)
+
+    def status(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+
+    def results(self):
+        return {day: job['result_path'] for day, job in sorted(self.jobs.items()) if job['status'] == 'done'}
+
+
+def day_key(data_day):
+    """
+    This function returns the ISO date string of the production day in the given dataframe.
+
+    Parameters:
+    data_day (DataFrame): The production orders of one day.
+
+    Returns:
+        str: The date of the day.
+    """
+    return str(data_day.iloc[0]['ProductieTijd'])
+
+
+def run_worker(queue, day_groups, output_dir, optimize_day, worker=None):
+    """
+    This function claims days from the queue and optimizes them until the queue is empty. The results of every day are
+    written to `<output_dir>/<day>.csv` before the day is marked as done. Days with more than one base length are
+    marked as done without a result file.
+
+    Parameters:
+    queue (SQLiteJobQueue): The job queue with the days.
+    day_groups (list): The production orders of the days, one dataframe per day.
+    output_dir (str): The directory for the result files.
+    optimize_day (function): The function that optimizes one day, called as optimize_day(data_day, date).
+    worker (str): The name of the worker, by default the host name and process id.
+
+    Returns:
+        int: The number of days optimized by this worker.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    days = {day_key(data_day): data_day for data_day in day_groups}
+    optimized = 0
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    while True:
+        # Only claim the days of this worker, the other days are left to the workers that have their data
+        day = queue.claim(worker, days=days.keys())
+        if day is None:
+            return optimized
+
+        data_day = days[day]
+
+        if len(data_day['Lengte'].unique()) > 1:
+            logger.warning("More than one base length found, skipping day %s", day)
+            queue.complete(day, None)
+            continue
+
+        try:
+            df_results = optimize_day(data_day, data_day.iloc[0]['ProductieTijd'])
+        except Exception as error:
+            logger.error("Optimization of %s failed: %r", day, error)
+            queue.fail(day, repr(error))
+            continue
+
+        # Write the results to a temporary file first, so a crash never leaves a partial result file
+        result_path = os.path.join(output_dir, f"{day}.csv")
+        try:
+            df_results.to_csv(result_path + ".tmp", index=False)
+            os.replace(result_path + ".tmp", result_path)
+        except OSError as error:
+            logger.error("Writing the results of %s failed: %r", day, error)
+            queue.fail(day, repr(error))
+            continue
+
+        queue.complete(day, result_path)
+        optimized += 1
+
+
+def run_days(day_groups, optimize_day, workers, queue_path=None, output_dir='results'):
+    """
+    This function optimizes the given days with local worker processes. The days are queued in a SQLite file, by
+    default `<output_dir>/jobs.sqlite`, so the run can be resumed after a crash and workers on other machines can join
+    with `run_worker` on the same file. A single worker without a queue path uses the LocalJobQueue instead.
+
+    Parameters:
+    day_groups (list): The production orders of the days, one dataframe per day.
+    optimize_day (function): The function that optimizes one day, called as optimize_day(data_day, date).
+    workers (int): The number of local worker processes.
+    queue_path (str): The SQLite file of the job queue, optional.
+    output_dir (str): The directory for the result files.
+
+    Returns:
+        dict: A dictionary with the day as key and the results dataframe as value, for every optimized day of the
+        given days.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    if workers <= 1 and queue_path is None:
+        queue = LocalJobQueue()
+    else:
+        queue = SQLiteJobQueue(queue_path or os.path.join(output_dir, 'jobs.sqlite'))
+
+    requested = [day_key(data_day) for data_day in day_groups]
+    queue.add_days(requested)
+
+    if workers > 1:
+        processes = [multiprocessing.Process(target=run_worker, args=(queue, day_groups, output_dir, optimize_day))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        run_worker(queue, day_groups, output_dir, optimize_day)
+
+    # The queue file can hold the days of earlier runs, only the requested days are returned
+    results = queue.results()
+    return {day: pd.read_csv(results[day]) for day in sorted(requested) if results.get(day)}
@@ -0,0 +1,104 @@
+import math
+import numpy as np
+import functions_GA
+import functions_bounds
+import functions_patterns
+
+
+# Run scheduling functions for the Genetic Algorithm
+# Used in the GA_CSP file to size the population and the number of generations of every subset by its difficulty
+
+# The bounds of the population size of a subset
+MIN_POPULATION_SIZE = 10
+MAX_POPULATION_SIZE = 300
+
+# The number of individuals per order length, multiplied by the square root of the difficulty of the subset
+POPULATION_FACTOR = 10
+
+# The bounds of the number of generations of a subset
+MIN_GENERATIONS = 3
+MAX_GENERATIONS = 50
+
+# The number of generations per base panel between the greedy solution and the lower bound
+GENERATION_FACTOR = 5
+
+
+def greedy_bases(order_length_quantities, base_length, pattern_generator=None) -> int:
+    """
+    This function calculates the number of base panels of the greedy solution, which cuts the pattern with the least
+    waste for the residual demand as many times as possible until the demand is cut. It is an upper bound on the number
+    of base panels of the best solution.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    base_length (int): The length of a base panel.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+
+    Returns:
+        int: The number of base panels of the greedy solution.
+    """
+    if pattern_generator is None:
+        pattern_generator = functions_patterns.PatternGenerator(order_length_quantities, base_length)
+
+    demand = np.fromiter(order_length_quantities.values(), dtype=np.int64, count=len(order_length_quantities))
+    nr_of_bases = 0
+
+    while demand.any():
+        pattern = pattern_generator.best(demand)
+        if pattern is None:
+            raise ValueError("An order length is longer than the base length")
+        nr_of_bases += functions_GA.applyPattern(demand, pattern)
+
+    return nr_of_bases
+
+
+def instance_features(order_length_quantities, base_length, pattern_generator=None, bound=None) -> dict:
+    """
+    This function calculates the features of a subset that its run is scheduled by: the number of distinct order
+    lengths, the total number of pieces, the lower bound and the greedy upper bound on the number of base panels, and
+    the gap between the two bounds.
+
+    Parameters:
+    order_length_quantities (dict): A dictionary with the order lengths as keys and the demand as values.
+    base_length (int): The length of a base panel.
+    pattern_generator (PatternGenerator): The knapsack pattern generator of the subset, optional.
+    bound (int): The lower bound of the subset if it is already calculated, optional.
+
+    Returns:
+        dict: The features of the subset.
+    """
+    lower_bound = functions_bounds.lower_bound(order_length_quantities, base_length) if bound is None else bound
+    upper_bound = greedy_bases(order_length_quantities, base_length, pattern_generator=pattern_generator)
+
+    return {'nr_of_lengths': len(order_length_quantities),
+            'nr_of_pieces': int(sum(order_length_quantities.values())),
+            'lower_bound': lower_bound,
+            'upper_bound': upper_bound,
+            'gap': upper_bound - lower_bound}
+
+
+def schedule(features, greedy_first=True) -> tuple:
+    """
+    This function sizes the run of a subset by its features. The population grows with the number of order lengths
+    and the number of generations with the number of pieces, and both grow with the difficulty, which is one plus the
+    gap between the greedy solution and the lower bound. A subset whose greedy solution reaches the lower bound gets
+    the smallest run if the greedy solution is the first individual, since the first individual is then optimal.
+
+    Parameters:
+    features (dict): The features of the subset, see `instance_features`.
+    greedy_first (bool): Whether the first individual of the run is the greedy solution, which is the case when it is
+    created with the pattern generator.
+
+    Returns:
+        tuple: The population size and the maximum number of generations.
+    """
+    if features['gap'] == 0 and greedy_first:
+        return MIN_POPULATION_SIZE, MIN_GENERATIONS
+
+    difficulty = 1 + features['gap']
+
+    population_size = POPULATION_FACTOR * features['nr_of_lengths'] * math.sqrt(difficulty)
+    generations = GENERATION_FACTOR * difficulty + math.log2(features['nr_of_pieces'])
+
+    return (int(min(max(population_size, MIN_POPULATION_SIZE), MAX_POPULATION_SIZE)),
+            int(min(max(generations, MIN_GENERATIONS), MAX_GENERATIONS)))
@@ -0,0 +1,105 @@
+import random
+import numpy as np
+
+
+# Selection functions for the Genetic Algorithm
+# Used in the GA_CSP file to select the parents and the elite of every generation over an array of fitness values
+
+# The number of individuals that compete in every tournament
+TOURNAMENT_SIZE = 3
+
+
+def fitness_array(individuals) -> np.ndarray:
+    """
+    This function returns the weighted fitness of the individuals as an array, so a higher value is always better,
+    also for the minimized material.
+
+    Parameters:
+    individuals (list): The individuals, with a valid fitness.
+
+    Returns:
+        np.ndarray: The weighted fitness of each individual.
+    """
+    return np.fromiter((ind.fitness.wvalues[0] for ind in individuals), dtype=np.float64, count=len(individuals))
+
+
+def random_generator():
+    """
+    This function creates a NumPy random generator seeded from `random`, so a seeded run selects the same individuals.
+
+    Returns:
+        Generator: The random generator.
+    """
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def selTournamentArray(individuals, k, tournsize=TOURNAMENT_SIZE):
+    """
+    This function selects k individuals with tournaments of tournsize random individuals, drawn with replacement. All
+    tournaments are drawn and decided at once over the fitness array.
+
+    Parameters:
+    individuals (list): The individuals to select from.
+    k (int): The number of individuals to select.
+    tournsize (int): The number of individuals in every tournament.
+
+    Returns:
+        list: The selected individuals.
+    """
+    if k <= 0:
+        return []
+
+    fitness = fitness_array(individuals)
+    contestants = random_generator().integers(0, len(individuals), size=(k, tournsize))
+    winners = contestants[np.arange(k), np.argmax(fitness[contestants], axis=1)]
+
+    return [individuals[i] for i in winners]
+
+
+def selStochasticUniversalArray(individuals, k):
+    """
+    This function selects k individuals with stochastic universal sampling. The weight of an individual is its
+    distance to the worst fitness, so the worst individual is only selected when all individuals are equal. The k
+    equally spaced pointers are placed on the cumulative weights with one random offset.
+
+    Parameters:
+    individuals (list): The individuals to select from.
+    k (int): The number of individuals to select.
+
+    Returns:
+        list: The selected individuals.
+    """
+    if k <= 0:
+        return []
+
+    fitness = fitness_array(individuals)
+    weights = fitness - fitness.min()
+    if weights.sum() <= 0:
+        weights = np.ones(len(individuals))
+
+    cumulative = np.cumsum(weights)
+    distance = cumulative[-1] / k
+    pointers = random_generator().uniform(0, distance) + distance * np.arange(k)
+    chosen = np.minimum(np.searchsorted(cumulative, pointers, side='right'), len(individuals) - 1)
+
+    return [individuals[i] for i in chosen]
+
+
+def selBestArray(individuals, k):
+    """
+    This function selects the k best individuals, in order of their fitness. Individuals with an equal fitness keep
+    their order in the population.
+
+    Parameters:
+    individuals (list): The individuals to select from.
+    k (int): The number of individuals to select.
+
+    Returns:
+        list: The best individuals.
+    """
+    if k <= 0:
+        return []
+
+    best = np.argsort(-fitness_array(individuals), kind='stable')[:k]
+
+    return [individuals[i] for i in best]
@@ -0,0 +1,41 @@
+import random
+import functions_GA
+import functions_schedule
+import GA_CSP
+
+# Subsets that are solved in a row in one process, like the subsets of a day in `OptimizeDay`
+FIRST_SUBSET = {2833: 8, 4903: 8, 3033: 4, 1500: 11, 2100: 7}
+SECOND_SUBSET = {5402: 33, 2392: 60, 3237: 48, 5956: 115, 5641: 140, 4642: 83, 537: 117, 4114: 159, 2340: 46,
+                 5616: 166}
+
+# A subset whose greedy solution reaches the lower bound, so it gets the smallest run
+GREEDY_OPTIMAL_SUBSET = {2433: 6, 2984: 30, 1345: 40, 3744: 23, 4422: 8, 1769: 19, 1238: 38, 1044: 39}
+
+
+def test_second_subset_starts_from_greedy_solution():
+    random.seed(0)
+    GA_CSP.solve(FIRST_SUBSET)
+
+    # Without time, the solution is the first individual, which is the greedy solution
+    solution = GA_CSP.solve(SECOND_SUBSET, time_limit=0)
+
+    assert solution.valid
+    assert solution.nr_of_bases == functions_schedule.greedy_bases(SECOND_SUBSET, functions_GA.base_length)
+
+
+def test_second_subset_with_smallest_run_reaches_greedy_solution():
+    random.seed(0)
+    GA_CSP.solve(FIRST_SUBSET)
+    solution = GA_CSP.solve(GREEDY_OPTIMAL_SUBSET)
+
+    assert solution.statistics['schedule']['gap'] == 0
+    assert solution.statistics['schedule']['population_size'] == functions_schedule.MIN_POPULATION_SIZE
+    assert solution.nr_of_bases == functions_schedule.greedy_bases(GREEDY_OPTIMAL_SUBSET, functions_GA.base_length)
+
+
+def test_no_smallest_run_without_greedy_first_individual():
+    features = {'nr_of_lengths': 8, 'nr_of_pieces': 203, 'lower_bound': 33, 'upper_bound': 33, 'gap': 0}
+
+    assert functions_schedule.schedule(features) == (functions_schedule.MIN_POPULATION_SIZE,
+                                                     functions_schedule.MIN_GENERATIONS)
+    assert functions_schedule.schedule(features, greedy_first=False)[0] > functions_schedule.MIN_POPULATION_SIZE